@@ -4,6 +4,7 @@ from fastapi import Request
 from sqladmin import ModelView
 
 from app_settings.models import Settings
+from app_settings.models import settings_cache
 from database import SessionLocal
 from schedule.service import update_start_time_scheduled_task
 
@@ -60,9 +61,16 @@ class SettingsAdmin(ModelView, model=Settings):
                     db.commit()
                     db.refresh(existing_model)
 
+            # Новые значения сразу видны этому и остальным процессам, не дожидаясь TTL
+            settings_cache.invalidate()
+
             # Обновляем задачу в планировщике
             update_start_time_scheduled_task(data["start_time"])
         except Exception as e:
             logger.error(f"Ошибка при обработке задачи: {e}")
         finally:
             db.close()
+
+    async def after_model_delete(self, model, request: Request):
+        """Без записи в БД настройки берутся из переменных окружения"""
+        settings_cache.invalidate()
@@ -0,0 +1,88 @@
+# снимок настроек приложения в памяти: БД читается не чаще раза в SETTINGS_CACHE_TTL секунд
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", 60))
+# Файл-метка в общем каталоге: его замена сообщает другим процессам, что настройки изменились
+SETTINGS_VERSION_FILE = os.getenv("SETTINGS_VERSION_FILE", ".settings_version")
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    start_time: int
+    eshmakar_api_token: str
+    eshmakar_count_of_page_to_parse: int
+
+
+class SettingsCache:
+    """Снимок настроек, общий для всех потоков процесса
+
+    Снимок перечитывается из БД по истечении ttl или сразу после invalidate().
+    invalidate() заменяет файл-метку, и остальные процессы (обработчики,
+    второй экземпляр приложения) замечают новую метку при следующем get():
+    проверка метки - один stat, без обращения к БД.
+    """
+
+    def __init__(self, loader, ttl=SETTINGS_CACHE_TTL, version_file=SETTINGS_VERSION_FILE):
+        self.loader = loader
+        self.ttl = ttl
+        self.version_file = Path(version_file) if version_file else None
+        self._snapshot = None
+        self._expires_at = 0.0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _read_version(self):
+        if self.version_file is None:
+            return None
+        try:
+            stat = self.version_file.stat()
+        except OSError:
+            return None
+        # Файл заменяется целиком, поэтому новый inode виден даже при грубом mtime
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _is_fresh(self, version):
+        return (
+            self._snapshot is not None
+            and time.monotonic() < self._expires_at
+            and version == self._version
+        )
+
+    def get(self) -> SettingsSnapshot:
+        version = self._read_version()
+        if self._is_fresh(version):
+            return self._snapshot
+
+        with self._lock:
+            # Пока ждали блокировку, снимок мог обновить другой поток
+            if self._is_fresh(version):
+                return self._snapshot
+            self._snapshot = self.loader()
+            self._expires_at = time.monotonic() + self.ttl
+            self._version = version
+            return self._snapshot
+
+    def invalidate(self, publish=True):
+        """Сброс снимка, с publish=True - и во всех процессах, читающих ту же метку"""
+        with self._lock:
+            self._snapshot = None
+        if publish:
+            self._publish()
+
+    def _publish(self):
+        if self.version_file is None:
+            return
+        tmp_path = self.version_file.with_name(f"{self.version_file.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(uuid.uuid4().hex, encoding="utf-8")
+            os.replace(tmp_path, self.version_file)
+        except OSError as e:
+            logger.error(f"Не удалось обновить метку настроек {self.version_file}: {e}")
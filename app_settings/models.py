@@ -1,5 +1,6 @@
 import os
 from sqlalchemy import Column, Integer, String
+from app_settings.cache import SettingsCache, SettingsSnapshot
 from database import Base, SessionLocal
 
 
@@ -21,37 +22,47 @@ class Settings(Base):
             return None
 
     @classmethod
-    def get_count_of_page_to_parse(cls):
-        """Получает количество страниц для парсинга"""
+    def load_snapshot(cls) -> SettingsSnapshot:
+        """Чтение настроек из БД, незаполненные значения берутся из переменных окружения"""
         db = SessionLocal()
         try:
             settings = cls._get_settings(db)
-            if settings and settings.eshmakar_count_of_page_to_parse is not None:
-                return settings.eshmakar_count_of_page_to_parse
-            return int(os.getenv("ESHMAKAR_COUNT_OF_PAGE_TO_PARSE", 1))
         finally:
             db.close()
 
+        count_of_page_to_parse = settings.eshmakar_count_of_page_to_parse if settings else None
+        if count_of_page_to_parse is None:
+            count_of_page_to_parse = int(os.getenv("ESHMAKAR_COUNT_OF_PAGE_TO_PARSE", 1))
+
+        api_token = settings.eshmakar_api_token if settings else None
+        if not api_token:
+            api_token = os.getenv("ESHMAKAR_API_TOKEN", "")
+
+        start_time = settings.start_time if settings else None
+        if start_time is None:
+            start_time = int(os.getenv("START_TIME", 21))
+
+        return SettingsSnapshot(
+            start_time=start_time,
+            eshmakar_api_token=api_token,
+            eshmakar_count_of_page_to_parse=count_of_page_to_parse,
+        )
+
+    @classmethod
+    def get_count_of_page_to_parse(cls):
+        """Получает количество страниц для парсинга"""
+        return settings_cache.get().eshmakar_count_of_page_to_parse
+
     @classmethod
     def get_eshmakar_api_token(cls):
         """Получает API токен"""
-        db = SessionLocal()
-        try:
-            settings = cls._get_settings(db)
-            if settings and settings.eshmakar_api_token:
-                return settings.eshmakar_api_token
-            return os.getenv("ESHMAKAR_API_TOKEN", "")
-        finally:
-            db.close()
+        return settings_cache.get().eshmakar_api_token
 
     @classmethod
     def get_start_time(cls):
         """Получает время начала работы"""
-        db = SessionLocal()
-        try:
-            settings = cls._get_settings(db)
-            if settings and settings.start_time is not None:
-                return settings.start_time
-            return int(os.getenv("START_TIME", 21))
-        finally:
-            db.close()
\ No newline at end of file
+        return settings_cache.get().start_time
+
+
+# Значения настроек читаются из снимка, БД - только при его обновлении
+settings_cache = SettingsCache(Settings.load_snapshot)
@@ -1,12 +1,18 @@
+import logging
 from collections.abc import Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy import inspect
+from sqlalchemy import Table
+from sqlalchemy import text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import sessionmaker
 
 from settings import DATABASE_URL
 
+logger = logging.getLogger(__name__)
+
 # Базовые настройки
 Base = declarative_base()
 engine = create_engine(DATABASE_URL)
@@ -19,3 +25,43 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def ensure_columns(bind, table: Table) -> list[str]:
+    """
+    Добавление в существующую таблицу столбцов модели, которых в ней еще нет
+
+    Миграций в проекте нет, а create_all не меняет уже созданные таблицы.
+    Добавляются только столбцы, допускающие NULL, и индексы по ним.
+
+    Returns:
+        Имена добавленных столбцов
+    """
+    inspector = inspect(bind)
+    if not inspector.has_table(table.name):
+        return []
+
+    existing = {column["name"] for column in inspector.get_columns(table.name)}
+    missing = [column for column in table.columns if column.name not in existing]
+    if not missing:
+        # Обычный запуск: схема не менялась, транзакция не нужна
+        return []
+
+    added = []
+    with bind.begin() as connection:
+        for column in missing:
+            if not column.nullable:
+                logger.warning(f"Столбец {table.name}.{column.name} NOT NULL, добавьте его вручную")
+                continue
+
+            column_type = column.type.compile(dialect=bind.dialect)
+            connection.execute(
+                text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"),
+            )
+            added.append(column.name)
+            logger.info(f"В таблицу {table.name} добавлен столбец {column.name}")
+
+    for index in table.indexes:
+        if any(column.name in added for column in index.columns):
+            index.create(bind)
+    return added
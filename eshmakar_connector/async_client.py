@@ -0,0 +1,118 @@
+# асинхронный клиент API eshmakar на aiohttp, модуль отдельный: aiohttp нужен только ему
+import asyncio
+import logging
+from typing import Any
+
+import aiohttp
+
+from eshmakar_connector.client import BASE_URL
+from eshmakar_connector.client import DEFAULT_TIMEOUT
+from eshmakar_connector.client import ENDPOINT_TIMEOUTS
+from eshmakar_connector.client import ERROR_MESSAGES
+from eshmakar_connector.client import EshmakarAPIError
+from eshmakar_connector.client import MAX_CONCURRENCY
+from eshmakar_connector.client import MAX_RETRIES
+from eshmakar_connector.client import retry_delay
+from eshmakar_connector.client import should_retry_error
+from eshmakar_connector.client import should_retry_status
+
+logger = logging.getLogger(__name__)
+
+# Соединение не установлено (отказ, DNS, таймаут подключения) - запрос точно не ушел
+_NOT_SENT_ERRORS = (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)
+
+
+class AsyncEshmakarClient:
+    """Асинхронный вариант клиента с теми же таймаутами и повторами
+
+    Используется как async with AsyncEshmakarClient() as client: сессия
+    aiohttp создается в работающем цикле событий и закрывается на выходе.
+    """
+
+    def __init__(
+        self,
+        base_url=BASE_URL,
+        timeouts=None,
+        max_retries=MAX_RETRIES,
+        max_concurrency=MAX_CONCURRENCY,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeouts = {**ENDPOINT_TIMEOUTS, **(timeouts or {})}
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._session = None
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        self._session = aiohttp.ClientSession(connector=connector)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+        self._session = None
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def _timeout(self, path: str):
+        connect, read = self.timeouts.get(path, DEFAULT_TIMEOUT)
+        return aiohttp.ClientTimeout(connect=connect, sock_read=read)
+
+    async def request(self, method: str, path: str, headers=None, json=None) -> Any:
+        """
+        Запрос к API с повторами, возвращает разобранный JSON
+
+        Raises:
+            EshmakarAPIError: Если ответ не получен или получен с кодом ошибки
+        """
+        url = self.url(path)
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                async with self._semaphore:
+                    async with self._session.request(
+                        method,
+                        url,
+                        headers=headers,
+                        json=json,
+                        timeout=self._timeout(path),
+                    ) as response:
+                        if last_attempt or not should_retry_status(path, response.status):
+                            return await self._handle_response(response)
+                        error = f"код ответа {response.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Запрос мог дойти до сервера: повторять можно только идемпотентные методы
+                if not should_retry_error(path, not isinstance(e, _NOT_SENT_ERRORS)):
+                    raise EshmakarAPIError(f"Нет ответа от {url}: {e!r}") from e
+                error = e
+
+            if last_attempt:
+                raise EshmakarAPIError(f"Нет ответа от {url}: {error!r}")
+            delay = retry_delay(attempt)
+            logger.warning(
+                f"Ошибка запроса {method} {url} ({error!r}), "
+                f"повтор {attempt + 1}/{self.max_retries} через {delay:.1f} сек",
+            )
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    async def _handle_response(response) -> Any:
+        if response.status >= 400:
+            error_msg = ERROR_MESSAGES.get(response.status, f"HTTP error: {response.status}")
+            logger.error(error_msg)
+            raise EshmakarAPIError(error_msg)
+        try:
+            return await response.json(content_type=None)
+        except ValueError as e:
+            error_msg = f"JSON decode error: {e}"
+            logger.error(error_msg)
+            raise EshmakarAPIError(error_msg)
+
+    async def get(self, path: str, headers=None) -> Any:
+        return await self.request("GET", path, headers=headers)
+
+    async def post(self, path: str, headers=None, json=None) -> Any:
+        return await self.request("POST", path, headers=headers, json=json)
@@ -0,0 +1,157 @@
+# клиент API eshmakar: постоянное соединение, таймауты по методам, повторы и лимит параллельности
+# Асинхронный вариант с теми же повторами - eshmakar_connector.async_client
+import logging
+import random
+import threading
+import time
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://eshmakar.ru/API/V1"
+PARSE_AD_PATH = "/ads/parseAd"
+ADD_TASK_PATH = "/tasks/add"
+TASKS_PATH = "/tasks/all"
+LAST_TASK_PATH = "/tasks/last"
+
+# (подключение, чтение) в секундах: парсинг объявления и список задач отвечают дольше остальных
+ENDPOINT_TIMEOUTS = {
+    PARSE_AD_PATH: (5, 90),
+    ADD_TASK_PATH: (5, 30),
+    TASKS_PATH: (5, 60),
+    LAST_TASK_PATH: (5, 30),
+}
+DEFAULT_TIMEOUT = (5, 30)
+# Повтор постановки задачи после отправленного запроса может создать ее дважды
+NON_IDEMPOTENT_PATHS = {ADD_TASK_PATH}
+
+MAX_RETRIES = 3  # Повторов после первой попытки
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+MAX_CONCURRENCY = 4  # Одновременных запросов к API из одного процесса
+
+ERROR_MESSAGES = {
+    400: "Bad Request: Неверный запрос",
+    401: "Unauthorized: Неверный токен",
+    404: "Not Found: Ничего не найдено",
+}
+
+
+class EshmakarAPIError(Exception):
+    """Базовый класс для ошибок API"""
+
+    pass
+
+
+def retry_delay(attempt: int) -> float:
+    """Пауза перед повтором: экспонента со случайным разбросом от нуля до потолка"""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+
+
+def should_retry_status(path: str, status: int) -> bool:
+    return status >= 500 and path not in NON_IDEMPOTENT_PATHS
+
+
+def should_retry_error(path: str, request_sent: bool) -> bool:
+    """Повтор после ошибки: идемпотентные методы - всегда, остальные - если запрос не ушел"""
+    return not request_sent or path not in NON_IDEMPOTENT_PATHS
+
+
+def _request_sent(error: requests.exceptions.RequestException) -> bool:
+    """Мог ли запрос дойти до сервера: нет, только если соединение не было установлено"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return False
+    # Обрыв после отправки (RemoteDisconnected, ProtocolError) - тоже ConnectionError
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return not isinstance(reason, NewConnectionError)
+
+
+class EshmakarClient:
+    """Синхронный клиент API для задач планировщика
+
+    Одна сессия requests держит соединения открытыми между вызовами, семафор
+    ограничивает число одновременных запросов из потоков планировщика.
+    Повторы - на ошибках соединения и ответах 5xx. Для постановки задачи
+    повтор выполняется только если запрос не был доставлен.
+    """
+
+    def __init__(
+        self,
+        base_url=BASE_URL,
+        timeouts=None,
+        max_retries=MAX_RETRIES,
+        max_concurrency=MAX_CONCURRENCY,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeouts = {**ENDPOINT_TIMEOUTS, **(timeouts or {})}
+        self.max_retries = max_retries
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def request(self, method: str, path: str, headers=None, json=None) -> requests.Response:
+        """
+        Запрос к API с повторами
+
+        Returns:
+            Последний полученный ответ, в том числе с кодом ошибки
+
+        Raises:
+            EshmakarAPIError: Если ответ так и не был получен
+        """
+        url = self.url(path)
+        timeout = self.timeouts.get(path, DEFAULT_TIMEOUT)
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                with self._semaphore:
+                    response = self.session.request(
+                        method,
+                        url,
+                        headers=headers,
+                        json=json,
+                        timeout=timeout,
+                    )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                # Запрос мог дойти до сервера: повторять можно только идемпотентные методы
+                if not should_retry_error(path, _request_sent(e)):
+                    raise EshmakarAPIError(f"Нет ответа от {url}: {e}") from e
+                error = e
+            else:
+                if last_attempt or not should_retry_status(path, response.status_code):
+                    return response
+                error = f"код ответа {response.status_code}"
+
+            if last_attempt:
+                raise EshmakarAPIError(f"Нет ответа от {url}: {error}")
+            delay = retry_delay(attempt)
+            logger.warning(
+                f"Ошибка запроса {method} {url} ({error}), "
+                f"повтор {attempt + 1}/{self.max_retries} через {delay:.1f} сек",
+            )
+            time.sleep(delay)
+
+    def get(self, path: str, headers=None) -> requests.Response:
+        return self.request("GET", path, headers=headers)
+
+    def post(self, path: str, headers=None, json=None) -> requests.Response:
+        return self.request("POST", path, headers=headers, json=json)
+
+    def close(self):
+        self.session.close()
+
+
+@lru_cache(maxsize=1)
+def get_client() -> EshmakarClient:
+    """Общий клиент процесса: соединения переиспользуются всеми задачами планировщика"""
+    return EshmakarClient()
@@ -1,26 +1,27 @@
 import json
 import logging
-from datetime import datetime
 from typing import Any
 
 import requests
 
 from app_settings.models import Settings
+from eshmakar_connector.client import ADD_TASK_PATH
+from eshmakar_connector.client import BASE_URL
+from eshmakar_connector.client import ERROR_MESSAGES
+from eshmakar_connector.client import EshmakarAPIError  # noqa: F401
+from eshmakar_connector.client import get_client
+from eshmakar_connector.client import LAST_TASK_PATH
+from eshmakar_connector.client import PARSE_AD_PATH
+from eshmakar_connector.client import TASKS_PATH
+from eshmakar_connector.response_archive import archive_response
 
 logger = logging.getLogger(__name__)
 
 # Конфигурация API
-BASE_URL = "https://eshmakar.ru/API/V1"
-PARSE_AD_URL = f"{BASE_URL}/ads/parseAd"
-ADD_TASK_URL = f"{BASE_URL}/tasks/add"
-TASKS_URL = f"{BASE_URL}/tasks/all"
-LAST_TASK_URL = f"{BASE_URL}/tasks/last"
-
-
-class EshmakarAPIError(Exception):
-    """Базовый класс для ошибок API"""
-
-    pass
+PARSE_AD_URL = f"{BASE_URL}{PARSE_AD_PATH}"
+ADD_TASK_URL = f"{BASE_URL}{ADD_TASK_PATH}"
+TASKS_URL = f"{BASE_URL}{TASKS_PATH}"
+LAST_TASK_URL = f"{BASE_URL}{LAST_TASK_PATH}"
 
 
 def get_headers():
@@ -36,13 +37,7 @@ def _handle_response(response: requests.Response) -> dict[str, Any] | None:
         response.raise_for_status()
         return response.json()
     except requests.exceptions.HTTPError as http_err:
-        error_msg = f"HTTP error occurred: {http_err}"
-        if response.status_code == 400:
-            error_msg = "Bad Request: Неверный запрос"
-        elif response.status_code == 401:
-            error_msg = "Unauthorized: Неверный токен"
-        elif response.status_code == 404:
-            error_msg = "Not Found: Ничего не найдено"
+        error_msg = ERROR_MESSAGES.get(response.status_code, f"HTTP error occurred: {http_err}")
         logger.error(error_msg)
         raise EshmakarAPIError(error_msg)
     except json.JSONDecodeError as json_err:
@@ -55,21 +50,6 @@ def _handle_response(response: requests.Response) -> dict[str, Any] | None:
         raise EshmakarAPIError(error_msg)
 
 
-def _save_to_json(data: dict[str, Any], prefix: str = "response") -> str:
-    """Сохранение данных в JSON файл"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{prefix}_{timestamp}.json"
-
-    try:
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-        logger.info(f"Данные сохранены в файл: {filename}")
-        return filename
-    except OSError as e:
-        logger.error(f"Ошибка при сохранении файла {filename}: {e}")
-        raise
-
-
 def parse_ad(link_to_parse: str) -> dict[str, Any]:
     """
     Парсинг объявления по ссылке или ID
@@ -88,9 +68,9 @@ def parse_ad(link_to_parse: str) -> dict[str, Any]:
     data = {"linkToParse": link_to_parse}
 
     try:
-        response = requests.post(PARSE_AD_URL, headers=get_headers(), json=data)
+        response = get_client().post(PARSE_AD_PATH, headers=get_headers(), json=data)
         result = _handle_response(response)
-        _save_to_json(result, "ad_response")
+        archive_response(PARSE_AD_URL, result)
         logger.info("Парсинг объявления выполнен успешно")
         return result
     except Exception as e:
@@ -100,7 +80,7 @@ def parse_ad(link_to_parse: str) -> dict[str, Any]:
 
 def add_task_to_parse(
     link: str,
-    count_of_page_to_parse: int = Settings.get_count_of_page_to_parse(),
+    count_of_page_to_parse: int | None = None,
     send_report_to_email: bool = False,
     remove_duplicates: bool = True,
     seller_params: bool = False,
@@ -111,7 +91,7 @@ def add_task_to_parse(
 
     Args:
         link: Ссылка для парсинга
-        count_of_page_to_parse: Количество страниц для парсинга
+        count_of_page_to_parse: Количество страниц для парсинга, по умолчанию - из настроек
         send_report_to_email: Отправлять отчет на email
         remove_duplicates: Удалять дубликаты
         seller_params: Парсить параметры продавца
@@ -125,6 +105,9 @@ def add_task_to_parse(
     """
     logger.info(f"Добавление задачи на парсинг: {link}")
 
+    if count_of_page_to_parse is None:
+        count_of_page_to_parse = Settings.get_count_of_page_to_parse()
+
     data = {
         "link": link,
         "countOfPageToParse": count_of_page_to_parse,
@@ -135,7 +118,7 @@ def add_task_to_parse(
     }
 
     try:
-        response = requests.post(ADD_TASK_URL, headers=get_headers(), json=data)
+        response = get_client().post(ADD_TASK_PATH, headers=get_headers(), json=data)
         # Проверка кода состояния ответа
         if response.status_code == 200:
             logger.info(f"Успешно 200: {response.text}")
@@ -164,9 +147,9 @@ def fetch_tasks() -> list[dict[str, Any]]:
     logger.info("Запрос списка задач")
 
     try:
-        response = requests.get(TASKS_URL, headers=get_headers())
+        response = get_client().get(TASKS_PATH, headers=get_headers())
         tasks = _handle_response(response)
-        _save_to_json(tasks, "tasks")
+        archive_response(TASKS_URL, tasks)
         logger.info(f"Получено {len(tasks)} задач")
         return tasks
     except Exception as e:
@@ -187,9 +170,9 @@ def fetch_last_task() -> dict[str, Any]:
     logger.info("Запрос последней задачи")
 
     try:
-        response = requests.get(LAST_TASK_URL, headers=get_headers())
+        response = get_client().get(LAST_TASK_PATH, headers=get_headers())
         task = _handle_response(response)
-        _save_to_json(task, "last_task")
+        archive_response(LAST_TASK_URL, task)
         print(task)
         return task
     except Exception as e:
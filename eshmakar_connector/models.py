@@ -9,8 +9,11 @@ from sqlalchemy import Integer
 from sqlalchemy import String
 from sqlalchemy import Text
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm import validates
 
 from database import Base
+import google_sheet.models  # noqa: F401
+from parsers.urls import url_hash as canonical_url_hash
 
 
 class TaskStatus(PyEnum):
@@ -30,6 +33,8 @@ class Task(Base):
         nullable=True,
     )  # Идентификатор задачи из eshmakar # noqa E501
     link_to_parse = Column(Text)
+    # SHA-256 канонической ссылки: сопоставление с задачами eshmakar по индексу
+    url_hash = Column(String(64), nullable=True, index=True)
     created_date = Column(DateTime, default=datetime.utcnow)
     parsed_date = Column(DateTime, nullable=True)
     link_to_google_sheet = Column(Text, nullable=True)
@@ -42,3 +47,8 @@ class Task(Base):
     has_data_in_db = Column(Boolean, default=False, index=True)
     in_eshmakar_queue = Column(Boolean, default=False)
     comment = Column(Text, nullable=True)
+
+    @validates("link_to_parse")
+    def _update_url_hash(self, key, link):
+        self.url_hash = canonical_url_hash(link) if link else None
+        return link
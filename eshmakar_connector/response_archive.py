@@ -0,0 +1,146 @@
+# архив ответов API eshmakar: запись в фоновом потоке, сжатые сегменты с ротацией и индексом
+# Просмотр архива: python -m eshmakar_connector.response_archive
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+from parsers.archive import ArchiveReader
+from parsers.archive import ArchiveWriter
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_ARCHIVE_DIR = os.getenv("ESHMAKAR_ARCHIVE_DIR", ".eshmakar_archive")
+RESPONSE_ARCHIVE_ENABLED = os.getenv("ESHMAKAR_ARCHIVE_ENABLED", "1") == "1"
+ARCHIVE_PREFIX = "eshmakar"
+SEGMENT_MAX_BYTES = 8 * 1024 * 1024
+MAX_SEGMENTS = int(os.getenv("ESHMAKAR_ARCHIVE_MAX_SEGMENTS", 50))
+MAX_AGE_DAYS = int(os.getenv("ESHMAKAR_ARCHIVE_MAX_AGE_DAYS", 30))
+QUEUE_SIZE = 1000  # При переполнении ответ не сохраняется, запрос к API не ждет
+CLOSE_TIMEOUT = 5  # Сколько секунд при выходе дописывать оставшиеся ответы
+
+
+class ResponseArchive:
+    """Сохранение ответов API без ожидания диска в потоке запроса
+
+    put() только кладет ответ в очередь. Фоновый поток сериализует его в
+    компактный JSON и дописывает WARC-записью типа resource в сегмент gzip,
+    адрес метода API и время попадают в индекс .cdx. Старые сегменты по
+    лимитам хранения удаляет ArchiveWriter при переходе на новый сегмент.
+    """
+
+    def __init__(
+        self,
+        directory=RESPONSE_ARCHIVE_DIR,
+        segment_max_bytes=SEGMENT_MAX_BYTES,
+        max_segments=MAX_SEGMENTS,
+        max_age_days=MAX_AGE_DAYS,
+        queue_size=QUEUE_SIZE,
+    ):
+        self.directory = directory
+        self.writer = ArchiveWriter(
+            directory,
+            ARCHIVE_PREFIX,
+            segment_max_bytes,
+            max_segments=max_segments,
+            max_age_days=max_age_days,
+        )
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="eshmakar-archive", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def put(self, target, data):
+        """Постановка ответа в очередь на запись"""
+        self.start()
+        try:
+            self._queue.put_nowait((target, time.time(), data))
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Очередь архива eshmakar заполнена, ответ {target} не сохранен")
+
+    def _write(self, target, fetched_at, data):
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.writer.write(
+            target,
+            payload,
+            warc_type="resource",
+            content_type="application/json",
+            fetched_at=fetched_at,
+        )
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write(*item)
+            except (OSError, TypeError, ValueError) as e:
+                logger.error(f"Ошибка записи ответа {item[0]} в архив eshmakar: {e}")
+        self.writer.close()
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """Дописывание очереди и закрытие сегмента"""
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("Архив eshmakar не успел записать очередь до выхода")
+            return
+        thread.join(timeout)
+
+
+@lru_cache(maxsize=1)
+def get_response_archive():
+    """Общий архив ответов процесса или None, если архив отключен"""
+    if not RESPONSE_ARCHIVE_ENABLED:
+        return None
+    return ResponseArchive()
+
+
+def archive_response(target, data):
+    """Сохранение ответа API в архив, ошибка архива не прерывает запрос"""
+    try:
+        archive = get_response_archive()
+        if archive is not None:
+            archive.put(target, data)
+    except (OSError, RuntimeError) as e:
+        logger.error(f"Ошибка архива eshmakar: {e}")
+
+
+def iter_responses(target=None, since=None, until=None, directory=RESPONSE_ARCHIVE_DIR):
+    """Ответы из архива по индексу: (адрес метода, время, данные)"""
+    reader = ArchiveReader(directory)
+    records = reader.iter_records(warc_type="resource", since=since, until=until, target=target)
+    for record in records:
+        yield record.target, record.fetched_at, json.loads(record.payload)
+
+
+def main():
+    """Количество сохраненных ответов по методам API"""
+    reader = ArchiveReader(RESPONSE_ARCHIVE_DIR)
+    counts = Counter(entry.target for entry in reader.entries(warc_type="resource"))
+    for target, count in counts.most_common():
+        latest = max(e.fetched_at for e in reader.entries(warc_type="resource", target=target))
+        print(f"{target}: ответов {count}, последний {time.ctime(latest)}")
+
+
+if __name__ == "__main__":
+    main()
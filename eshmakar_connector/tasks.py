@@ -1,8 +1,6 @@
 import logging
 from datetime import datetime
 from datetime import time
-from urllib.parse import parse_qs
-from urllib.parse import urlparse
 
 from sqlalchemy.orm import Session
 
@@ -13,11 +11,15 @@ from eshmakar_connector.connector import fetch_last_task
 from eshmakar_connector.connector import fetch_tasks
 from eshmakar_connector.models import Task
 from eshmakar_connector.models import TaskStatus
+from parsers.urls import normalize_url
+from parsers.urls import url_hash
 
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
+URL_HASH_BATCH_SIZE = 500  # Задач за один запрос при заполнении и сопоставлении хэшей ссылок
+
 
 def is_task_processing_ready() -> bool:
     try:
@@ -247,78 +249,101 @@ def enqueue_tasks_for_parsing(db_session: Session):
 
 def are_urls_equivalent(url1: str, url2: str) -> bool:
     """
-    Проверяет эквивалентность двух URL, включая параметры запроса
+    Проверяет эквивалентность двух URL по каноническому виду
 
     Args:
         url1: Первый URL для сравнения
         url2: Второй URL для сравнения
 
     Returns:
-        bool: True если URL полностью эквивалентны (схема, хост, путь и параметры)
+        bool: True если совпадают схема, хост, путь и параметры без учета
+        их порядка и служебных параметров вроде context
     """
-    parsed1 = urlparse(url1)
-    parsed2 = urlparse(url2)
-
-    # Сравниваем базовые компоненты URL
-    if (
-        parsed1.scheme != parsed2.scheme
-        or parsed1.netloc != parsed2.netloc
-        or parsed1.path != parsed2.path
-    ):
-        return False
+    return normalize_url(url1) == normalize_url(url2)
+
 
-    # Парсим параметры запроса
-    params1 = parse_qs(parsed1.query)
-    params2 = parse_qs(parsed2.query)
+def backfill_url_hashes(db_session: Session, batch_size: int = URL_HASH_BATCH_SIZE) -> int:
+    """Заполнение url_hash у задач, созданных до появления столбца
+
+    Returns:
+        Количество обновленных задач
+    """
+    updated = 0
+    while True:
+        tasks = (
+            db_session.query(Task)
+            .filter(
+                Task.url_hash.is_(None),
+                Task.link_to_parse.isnot(None),
+                Task.link_to_parse != "",
+            )
+            .limit(batch_size)
+            .all()
+        )
+        if not tasks:
+            break
+        for task in tasks:
+            task.url_hash = url_hash(task.link_to_parse)
+        db_session.commit()
+        updated += len(tasks)
 
-    # Сравниваем параметры
-    return params1 == params2
+    if updated:
+        logger.info(f"Заполнен url_hash у {updated} задач")
+    return updated
 
 
 def update_tasks_status_from_eshmakar(db_session: Session):
     """Обновление статусов задач на основе данных из eshmakar API
 
+    Задачи сопоставляются по хэшу канонической ссылки: словарь хэшей задач
+    eshmakar и выборка своих задач по индексу url_hash вместо сравнения
+    каждой пары ссылок.
+
     Args:
         db_session: Сессия базы данных SQLAlchemy
     """
-    pending_tasks = (
-        db_session.query(Task)
-        .filter(
-            Task.status == TaskStatus.IN_PROGRESS,
-        )
-        .all()
-    )
+    pending_count = db_session.query(Task).filter(Task.status == TaskStatus.IN_PROGRESS).count()
 
-    if not pending_tasks:
+    if not pending_count:
         logger.info("Нет задач для обновления статуса")
         return
 
-    logger.info(f"Найдено {len(pending_tasks)} задач для обновления статуса")
+    logger.info(f"Найдено {pending_count} задач для обновления статуса")
 
     try:
         eshmakar_tasks = fetch_tasks()
-        eshmakar_tasks_map = {task["linkToParse"]: task for task in eshmakar_tasks}
+        eshmakar_tasks_map = {
+            url_hash(task["linkToParse"]): task
+            for task in eshmakar_tasks
+            if task.get("linkToParse")
+        }
 
         logger.info(f"Получено {len(eshmakar_tasks)} задач из eshmakar API")
     except Exception as e:
         logger.error(f"Ошибка при получении задач из eshmakar API: {str(e)}")
         return
 
+    # Задачи без хэша не нашлись бы по индексу
+    backfill_url_hashes(db_session)
+
+    hashes = list(eshmakar_tasks_map)
+    matched_tasks = []
+    for start in range(0, len(hashes), URL_HASH_BATCH_SIZE):
+        matched_tasks.extend(
+            db_session.query(Task)
+            .filter(
+                Task.status == TaskStatus.IN_PROGRESS,
+                Task.url_hash.in_(hashes[start : start + URL_HASH_BATCH_SIZE]),
+            )
+            .all(),
+        )
+    logger.debug(f"Без соответствия в eshmakar: {pending_count - len(matched_tasks)} задач")
+
     updated_count = 0
 
-    for task in pending_tasks:
+    for task in matched_tasks:
         try:
-            # Ищем соответствующую задачу в ответе API
-            matching_eshmakar_task = None
-
-            for eshmakar_url, eshmakar_task in eshmakar_tasks_map.items():
-                if are_urls_equivalent(task.link_to_parse, eshmakar_url):
-                    matching_eshmakar_task = eshmakar_task
-                    break
-
-            if not matching_eshmakar_task:
-                logger.debug(f"Для задачи {task.id} не найдено соответствие в eshmakar")
-                continue
+            matching_eshmakar_task = eshmakar_tasks_map[task.url_hash]
 
             # Обновляем поля задачи
             if "id" in matching_eshmakar_task:
@@ -353,4 +378,4 @@ def update_tasks_status_from_eshmakar(db_session: Session):
                 exc_info=True,
             )
 
-    logger.info(f"Обновлено {updated_count} из {len(pending_tasks)} задач")
+    logger.info(f"Обновлено {updated_count} из {pending_count} задач")
@@ -3,18 +3,27 @@ import hashlib
 import logging
 import re
 from datetime import datetime
+from functools import lru_cache
 from io import StringIO
 
 import requests
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from database import SessionLocal
 from eshmakar_connector.models import Task
 from eshmakar_connector.models import TaskStatus
 from google_sheet.models import GoogleSheetRecord
+from parsers.seen_index import SeenIndex
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
+EXISTS_QUERY_BATCH = 500  # Сколько хэшей проверять в БД одним запросом
+INSERT_ATTEMPTS = 3  # Попыток вставки, если строки параллельно сохранил другой обработчик
+_UNCOMMITTED_HASHES = "uncommitted_row_hashes"  # Ключ в Session.info
+
 
 def fetch_and_process_sheets(db: Session, batch_size: int = 10) -> dict[str, int]:
     """
@@ -112,6 +121,134 @@ def fetch_sheet_data(sheet_id: str) -> str:
         raise ValueError(f"Не удалось декодировать данные таблицы {sheet_id}")
 
 
+@lru_cache(maxsize=1)
+def get_sheet_rows_index() -> SeenIndex:
+    """Индекс хэшей строк, уже сохраненных в google_sheet_records"""
+
+    def load_row_hashes():
+        db = SessionLocal()
+        try:
+            return [row_hash for (row_hash,) in db.query(GoogleSheetRecord.row_hash)]
+        finally:
+            db.close()
+
+    return SeenIndex("sheet_rows", rebuild=load_row_hashes)
+
+
+def _existing_row_hashes(db: Session, row_hashes: set[str]) -> set[str]:
+    """Какие из хэшей уже есть в БД, запросами пачками вместо запроса на строку"""
+    existing = set()
+    hashes = list(row_hashes)
+    for start in range(0, len(hashes), EXISTS_QUERY_BATCH):
+        batch = hashes[start : start + EXISTS_QUERY_BATCH]
+        existing.update(
+            row_hash
+            for (row_hash,) in db.query(GoogleSheetRecord.row_hash).filter(
+                GoogleSheetRecord.row_hash.in_(batch),
+            )
+        )
+    return existing
+
+
+def row_hash(row: dict) -> str:
+    """Хэш строки, по которому строки не сохраняются повторно"""
+    return hashlib.md5(str(row).encode()).hexdigest()
+
+
+def save_rows(db: Session, rows: list[dict], sheet_id: str, task_id: int, key=None) -> int:
+    """
+    Сохранение новых строк в google_sheet_records без повторов
+
+    Общий путь для строк из Google таблиц и объявлений, полученных парсерами.
+    Фильтр Блума - только подсказка: "возможно есть" проверяются в БД сразу,
+    "точно нет" вставляются в точке сохранения, и если уникальный row_hash
+    все же нарушен (индекс другого хоста, устаревший индекс), эти строки
+    тоже проверяются в БД. Сессия не фиксируется, commit делает вызывающий,
+    индекс пополняется только после успешного commit.
+
+    Args:
+        db: Сессия базы данных
+        rows: Строки данных
+        sheet_id: ID таблицы или источника строк
+        task_id: ID исходной задачи
+        key: Функция строка -> хэш для отсева повторов, по умолчанию row_hash
+
+    Returns:
+        Количество добавленных новых записей
+    """
+    key = key or row_hash
+    new_rows = {}
+    for row_num, row in enumerate(rows, 1):
+        hash_ = key(row)
+        new_rows.setdefault(hash_, (row_num, row))  # Повтор строки в тех же данных не добавляется
+
+    index = get_sheet_rows_index()
+    maybe_existing = index.maybe_contains_many(set(new_rows))
+    unchecked = set(new_rows) - maybe_existing
+    for hash_ in _existing_row_hashes(db, maybe_existing) if maybe_existing else ():
+        del new_rows[hash_]
+
+    records = []
+    for attempt in range(INSERT_ATTEMPTS):
+        records = _build_records(new_rows, sheet_id, task_id)
+        try:
+            with db.begin_nested():
+                db.add_all(records)
+            break
+        except IntegrityError:
+            if attempt == INSERT_ATTEMPTS - 1:
+                raise
+            logger.warning(f"Строки источника {sheet_id} уже есть в БД, повторная проверка")
+            # После первой неудачи проверяются все строки: их мог сохранить другой процесс
+            checked = unchecked if attempt == 0 else set(new_rows)
+            for hash_ in _existing_row_hashes(db, checked & set(new_rows)):
+                del new_rows[hash_]
+
+    db.info.setdefault(_UNCOMMITTED_HASHES, []).extend(record.row_hash for record in records)
+
+    logger.info(f"Обработано {len(rows)} строк, добавлено {len(records)} новых записей")
+    return len(records)
+
+
+def _build_records(new_rows: dict, sheet_id: str, task_id: int) -> list[GoogleSheetRecord]:
+    records = []
+    for hash_, (row_num, row) in new_rows.items():
+        try:
+            records.append(
+                GoogleSheetRecord(
+                    sheet_id=sheet_id,
+                    source_task_id=task_id,
+                    row_data=row,
+                    row_hash=hash_,
+                ),
+            )
+            logger.debug(f"Добавлена новая запись (строка {row_num})")
+        except Exception as e:
+            logger.error(f"Ошибка обработки строки {row_num}: {str(e)}", exc_info=True)
+    return records
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_committed_rows(session):
+    """Хэши строк попадают в индекс только после того, как строки зафиксированы в БД"""
+    row_hashes = session.info.pop(_UNCOMMITTED_HASHES, None)
+    if not row_hashes:
+        return
+    try:
+        index = get_sheet_rows_index()
+        index.add_many(row_hashes)
+        index.persist()
+    except OSError as e:
+        logger.error(f"Не удалось сохранить индекс строк: {e}")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back_rows(session, previous_transaction):
+    # Откат точки сохранения в save_rows не отменяет строки, добавленные раньше
+    if previous_transaction.parent is None:
+        session.info.pop(_UNCOMMITTED_HASHES, None)
+
+
 def process_sheet_data(csv_data: str, sheet_id: str, task_id: int, db: Session) -> int:
     """
     Обрабатывает CSV данные и сохраняет новые записи в БД
@@ -125,40 +262,11 @@ def process_sheet_data(csv_data: str, sheet_id: str, task_id: int, db: Session)
     Returns:
         Количество добавленных новых записей
     """
-    new_records = 0
     logger.debug(f"Начало обработки CSV данных для таблицы {sheet_id}")
 
     try:
         reader = csv.DictReader(StringIO(csv_data))
-        for row_num, row in enumerate(reader, 1):
-            try:
-                row_hash = hashlib.md5(str(row).encode()).hexdigest()
-                exists = (
-                    db.query(GoogleSheetRecord)
-                    .filter_by(
-                        sheet_id=sheet_id,
-                        row_hash=row_hash,
-                    )
-                    .first()
-                )
-
-                if not exists:
-                    record = GoogleSheetRecord(
-                        sheet_id=sheet_id,
-                        source_task_id=task_id,
-                        row_data=row,
-                        row_hash=row_hash,
-                    )
-                    db.add(record)
-                    new_records += 1
-                    logger.debug(f"Добавлена новая запись (строка {row_num})")
-
-            except Exception as e:
-                logger.error(f"Ошибка обработки строки {row_num}: {str(e)}", exc_info=True)
-                continue
-
-        logger.info(f"Обработано {row_num} строк, добавлено {new_records} новых записей")
-        return new_records
+        return save_rows(db, list(reader), sheet_id, task_id)
 
     except csv.Error as e:
         logger.error(f"Ошибка парсинга CSV данных: {str(e)}")
@@ -1,5 +1,7 @@
 import logging
+import time
 from contextlib import asynccontextmanager
+from contextlib import contextmanager
 
 from fastapi import FastAPI
 from sqladmin import Admin
@@ -8,10 +10,13 @@ from app_settings.admin import SettingsAdmin
 from app_settings.init_settings import init_settings
 from database import Base
 from database import engine
+from database import ensure_columns
 from database import SessionLocal
 from eshmakar_connector.admin import TaskAdmin
+from eshmakar_connector.tasks import backfill_url_hashes
 from google_sheet.admin import GoogleSheetRecordAdmin
 from google_sheet.routers import sheets_router
+from parsers.admin import CrawlPageAdmin
 from schedule.admin import TaskScheduleAdmin
 from schedule.initial_data import init_default_schedules
 from schedule.routers import schedule_router
@@ -30,15 +35,46 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+@contextmanager
+def startup_phase(timings: dict, name: str):
+    """Замер длительности этапа запуска"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - started
+
+
+def log_startup_report(timings: dict):
+    total = sum(timings.values())
+    phases = ", ".join(f"{name} {seconds:.3f}" for name, seconds in timings.items())
+    logger.info(f"Запуск приложения за {total:.3f} сек: {phases}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Отчет по этапам доступен и после запуска: app.state.startup_timings
+    timings = app.state.startup_timings = {}
+
     # Создание всех таблиц в базе данных
-    Base.metadata.create_all(bind=engine)
+    with startup_phase(timings, "create_all"):
+        Base.metadata.create_all(bind=engine)
+    # Столбцы, добавленные в модели после создания таблиц
+    with startup_phase(timings, "ensure_columns"):
+        for table in Base.metadata.sorted_tables:
+            ensure_columns(engine, table)
     db = SessionLocal()
     try:
-        init_settings(db)
-        init_default_schedules(db)
-        init_scheduler(db)
+        with startup_phase(timings, "init_settings"):
+            init_settings(db)
+        # После первого запуска с новым столбцом здесь только один пустой запрос
+        with startup_phase(timings, "backfill_url_hashes"):
+            backfill_url_hashes(db)
+        with startup_phase(timings, "init_default_schedules"):
+            init_default_schedules(db)
+        with startup_phase(timings, "init_scheduler"):
+            init_scheduler(db)
+        log_startup_report(timings)
 
         yield
     finally:
@@ -67,6 +103,7 @@ admin.add_view(TaskAdmin)
 admin.add_view(GoogleSheetRecordAdmin)
 admin.add_view(TaskScheduleAdmin)
 admin.add_view(SettingsAdmin)
+admin.add_view(CrawlPageAdmin)
 
 
 # Для запуска приложения через uvicorn
@@ -0,0 +1,36 @@
+from sqladmin import ModelView
+
+from parsers.models import CrawlPage
+
+
+class CrawlPageAdmin(ModelView, model=CrawlPage):
+    """Админ-панель очереди обхода страниц"""
+
+    name = "Страница обхода"
+    name_plural = "Очередь обхода страниц"
+
+    column_list = [
+        CrawlPage.url,
+        CrawlPage.state,
+        CrawlPage.priority,
+        CrawlPage.attempts,
+        CrawlPage.lease_owner,
+        CrawlPage.lease_expires_at,
+        CrawlPage.updated_at,
+    ]
+
+    column_labels = {
+        "search_url": "Ссылка на поиск",
+        "page": "Номер страницы",
+        "url": "Ссылка на страницу",
+        "state": "Состояние",
+        "priority": "Приоритет",
+        "attempts": "Попыток",
+        "lease_owner": "Обработчик",
+        "lease_expires_at": "Аренда до",
+        "last_error": "Последняя ошибка",
+        "created_at": "Дата создания",
+        "updated_at": "Дата обновления",
+    }
+
+    can_create = False
@@ -0,0 +1,368 @@
+# архив загруженных страниц в формате WARC: отдельный gzip на запись, индекс смещений рядом
+# Перебор архива: python -m parsers.archive
+import gzip
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timezone
+from functools import lru_cache
+from pathlib import Path
+
+ARCHIVE_DIR = os.getenv("CRAWL_ARCHIVE_DIR", ".crawl_archive")
+ARCHIVE_ENABLED = os.getenv("CRAWL_ARCHIVE_ENABLED", "1") == "1"
+SEGMENT_MAX_BYTES = 256 * 1024 * 1024  # После этого размера начинается новый сегмент
+MAX_SEGMENTS = int(os.getenv("CRAWL_ARCHIVE_MAX_SEGMENTS", 20))
+MAX_AGE_DAYS = int(os.getenv("CRAWL_ARCHIVE_MAX_AGE_DAYS", 14))
+SEGMENT_SUFFIX = ".warc.gz"
+INDEX_SUFFIX = ".cdx"  # Строки: адрес, время, смещение, длина, тип записи
+
+# Тело хранится распакованным, поэтому заголовки о сжатии и длине передачи не сохраняются
+SKIPPED_HTTP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+HTTP_REASONS = {200: "OK", 304: "Not Modified", 403: "Forbidden", 429: "Too Many Requests"}
+
+
+def _warc_date(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def http_payload(status, headers, body):
+    """HTTP-ответ целиком, как его хранит WARC-запись типа response"""
+    reason = HTTP_REASONS.get(status, "")
+    lines = [f"HTTP/1.1 {status} {reason}".rstrip()]
+    lines.extend(
+        f"{name}: {value}"
+        for name, value in (headers or {}).items()
+        if name.lower() not in SKIPPED_HTTP_HEADERS
+    )
+    head = "\r\n".join(lines) + "\r\n\r\n"
+    return head.encode("utf-8") + body.encode("utf-8")
+
+
+@dataclass
+class ArchiveRecord:
+    target: str
+    fetched_at: float
+    warc_type: str
+    headers: dict  # Заголовки WARC
+    payload: bytes
+
+    def http(self):
+        """(код ответа, заголовки, тело) для записи типа response"""
+        head, _, body = self.payload.partition(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("utf-8").split("\r\n")
+        headers = dict(line.split(": ", 1) for line in header_lines if ": " in line)
+        return int(status_line.split()[1]), headers, body.decode("utf-8")
+
+    @property
+    def body(self):
+        if self.warc_type == "response":
+            return self.http()[2]
+        return self.payload.decode("utf-8")
+
+
+def _encode_record(target, payload, warc_type, content_type, fetched_at):
+    headers = [
+        "WARC/1.0",
+        f"WARC-Type: {warc_type}",
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+        f"WARC-Date: {_warc_date(fetched_at)}",
+        f"WARC-Target-URI: {target}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(payload)}",
+    ]
+    record = "\r\n".join(headers).encode("utf-8") + b"\r\n\r\n" + payload + b"\r\n\r\n"
+    # Каждая запись - отдельный gzip: ее можно распаковать, начав чтение с ее смещения
+    return gzip.compress(record, compresslevel=6)
+
+
+def _decode_record(data):
+    raw = gzip.decompress(data)
+    head, _, rest = raw.partition(b"\r\n\r\n")
+    headers = dict(
+        line.split(": ", 1) for line in head.decode("utf-8").split("\r\n")[1:] if ": " in line
+    )
+    payload = rest[: int(headers["Content-Length"])]
+    fetched_at = datetime.strptime(headers["WARC-Date"], "%Y-%m-%dT%H:%M:%SZ")
+    return ArchiveRecord(
+        target=headers["WARC-Target-URI"],
+        fetched_at=fetched_at.replace(tzinfo=timezone.utc).timestamp(),
+        warc_type=headers["WARC-Type"],
+        headers=headers,
+        payload=payload,
+    )
+
+
+def apply_retention(directory, prefix, keep_segment=None, max_segments=None, max_age_days=None):
+    """
+    Удаление старых сегментов с префиксом prefix вместе с индексами
+
+    Удаляются сегменты старше max_age_days и самые старые сверх max_segments,
+    None отключает соответствующий лимит. Текущий сегмент keep_segment не удаляется.
+
+    Returns:
+        Количество удаленных сегментов
+    """
+    directory = Path(directory)
+    # Имя сегмента начинается с времени создания, сортировка по имени - от старых к новым
+    segments = sorted(directory.glob(f"{prefix}-*{SEGMENT_SUFFIX}"))
+    cutoff = time.time() - max_age_days * 24 * 60 * 60 if max_age_days is not None else None
+    excess = len(segments) - max_segments if max_segments is not None else 0
+    removed = 0
+    for segment in segments:
+        if segment.name == keep_segment:
+            continue
+        try:
+            too_old = cutoff is not None and segment.stat().st_mtime < cutoff
+        except FileNotFoundError:
+            continue
+        if excess <= 0 and not too_old:
+            continue
+
+        index = segment.with_name(segment.name.removesuffix(SEGMENT_SUFFIX) + INDEX_SUFFIX)
+        # Индекс удаляется первым: читатель не найдет записей в удаленном сегменте
+        index.unlink(missing_ok=True)
+        segment.unlink(missing_ok=True)
+        excess -= 1
+        removed += 1
+    return removed
+
+
+class ArchiveWriter:
+    """Дописывание записей в текущий сегмент с переходом на новый по размеру
+
+    Имя сегмента содержит время создания и pid, поэтому несколько процессов
+    пишут в один каталог, не мешая друг другу. Строка индекса дописывается
+    после записи, и оборванная запись в индекс не попадает. Если заданы
+    max_segments или max_age_days, при переходе на новый сегмент старые
+    удаляются.
+    """
+
+    def __init__(
+        self,
+        directory=ARCHIVE_DIR,
+        prefix="crawl",
+        segment_max_bytes=SEGMENT_MAX_BYTES,
+        max_segments=None,
+        max_age_days=None,
+    ):
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.segment_max_bytes = segment_max_bytes
+        self.max_segments = max_segments
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._segment = None
+        self._index = None
+        self._segment_path = None
+        self._segment_number = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _open_segment(self):
+        self._close_segment()
+        self._segment_number += 1
+        stamp = time.strftime("%Y%m%d%H%M%S", time.gmtime())
+        name = f"{self.prefix}-{stamp}-{os.getpid()}-{self._segment_number:05d}"
+        self._segment_path = self.directory / f"{name}{SEGMENT_SUFFIX}"
+        self._segment = open(self._segment_path, "ab")
+        self._index = open(self.directory / f"{name}{INDEX_SUFFIX}", "a", encoding="utf-8")
+        if self.max_segments is not None or self.max_age_days is not None:
+            removed = apply_retention(
+                self.directory,
+                self.prefix,
+                self._segment_path.name,
+                self.max_segments,
+                self.max_age_days,
+            )
+            if removed:
+                print(f"Удалено старых сегментов архива {self.prefix}: {removed}")
+
+    def _close_segment(self):
+        if self._segment:
+            self._segment.close()
+            self._index.close()
+            self._segment = self._index = None
+
+    def write(
+        self,
+        target,
+        payload,
+        warc_type="response",
+        content_type="application/http; msgtype=response",
+        fetched_at=None,
+    ):
+        """Добавление записи, возвращает (имя сегмента, смещение, длина)"""
+        fetched_at = fetched_at or time.time()
+        data = _encode_record(target, payload, warc_type, content_type, fetched_at)
+
+        with self._lock:
+            if self._segment is None or self._segment.tell() >= self.segment_max_bytes:
+                self._open_segment()
+
+            offset = self._segment.tell()
+            self._segment.write(data)
+            self._segment.flush()
+            self._index.write(f"{target}\t{fetched_at:.3f}\t{offset}\t{len(data)}\t{warc_type}\n")
+            self._index.flush()
+            return self._segment_path.name, offset, len(data)
+
+    def write_response(self, url, body, status=200, headers=None, fetched_at=None):
+        """Сохранение загруженной страницы"""
+        return self.write(url, http_payload(status, headers, body), fetched_at=fetched_at)
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+
+
+@dataclass
+class IndexEntry:
+    target: str
+    fetched_at: float
+    segment: str
+    offset: int
+    length: int
+    warc_type: str
+
+
+class ArchiveReader:
+    """Чтение записей по индексу: поиск по адресу без распаковки сегмента
+
+    Индексы всех сегментов читаются один раз, после этого запись находится
+    в словаре и читается одним seek и одним read.
+    """
+
+    def __init__(self, directory=ARCHIVE_DIR):
+        self.directory = Path(directory)
+        self._entries = []
+        self._latest = {}
+        self.reload()
+
+    def reload(self):
+        self._entries = []
+        self._latest = {}
+        for index_path in sorted(self.directory.glob(f"*{INDEX_SUFFIX}")):
+            segment = index_path.name.removesuffix(INDEX_SUFFIX) + SEGMENT_SUFFIX
+            try:
+                segment_size = (self.directory / segment).stat().st_size
+            except FileNotFoundError:
+                continue
+            with open(index_path, encoding="utf-8") as f:
+                for line in f:
+                    fields = line.rstrip("\n").split("\t")
+                    if len(fields) != 5:
+                        continue
+                    target, fetched_at, offset, length, warc_type = fields
+                    entry = IndexEntry(
+                        target,
+                        float(fetched_at),
+                        segment,
+                        int(offset),
+                        int(length),
+                        warc_type,
+                    )
+                    # Запись, которую не успели дописать в сегмент, пропускается
+                    if entry.offset + entry.length > segment_size:
+                        continue
+                    self._entries.append(entry)
+                    latest = self._latest.get(target)
+                    if latest is None or latest.fetched_at <= entry.fetched_at:
+                        self._latest[target] = entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def entries(self, warc_type=None, since=None, until=None, target=None):
+        """Записи индекса с отбором по типу, времени и адресу"""
+        return [
+            entry
+            for entry in self._entries
+            if (warc_type is None or entry.warc_type == warc_type)
+            and (target is None or entry.target == target)
+            and (since is None or entry.fetched_at >= since)
+            and (until is None or entry.fetched_at < until)
+        ]
+
+    def read(self, entry):
+        with open(self.directory / entry.segment, "rb") as f:
+            f.seek(entry.offset)
+            return _decode_record(f.read(entry.length))
+
+    def get(self, target):
+        """Последняя запись по адресу или None"""
+        entry = self._latest.get(target)
+        return self.read(entry) if entry else None
+
+    def iter_records(self, warc_type=None, since=None, until=None, target=None):
+        """Последовательное чтение записей, сегмент открывается один раз"""
+        entries = sorted(
+            self.entries(warc_type, since, until, target),
+            key=lambda entry: (entry.segment, entry.offset),
+        )
+        segment, f = None, None
+        try:
+            for entry in entries:
+                if entry.segment != segment:
+                    if f:
+                        f.close()
+                    segment = entry.segment
+                    f = open(self.directory / segment, "rb")
+                f.seek(entry.offset)
+                yield _decode_record(f.read(entry.length))
+        finally:
+            if f:
+                f.close()
+
+
+@lru_cache(maxsize=1)
+def get_archive_writer():
+    """Общий архив страниц процесса или None, если архив отключен"""
+    if not ARCHIVE_ENABLED:
+        return None
+    return ArchiveWriter(max_segments=MAX_SEGMENTS, max_age_days=MAX_AGE_DAYS)
+
+
+def disable_archive():
+    """Отключение архива в текущем процессе, например для замеров на локальном сервере"""
+    global ARCHIVE_ENABLED
+
+    ARCHIVE_ENABLED = False
+    writer = get_archive_writer()
+    if writer is not None:
+        writer.close()
+    get_archive_writer.cache_clear()
+
+
+def archive_page(url, body, status=200, headers=None):
+    """Сохранение страницы в архив, ошибка записи не прерывает парсинг"""
+    writer = get_archive_writer()
+    if writer is None:
+        return
+    try:
+        writer.write_response(url, body, status, headers)
+    except OSError as e:
+        print(f"Ошибка записи страницы в архив: {e}")
+
+
+def main():
+    """Повторное извлечение объявлений из всех страниц архива"""
+    from parsers.extractor import extract_ads
+
+    reader = ArchiveReader()
+    started = time.perf_counter()
+    pages = ads = 0
+    for record in reader.iter_records(warc_type="response"):
+        status, _, body = record.http()
+        if status != 200:
+            continue
+        pages += 1
+        ads += len(extract_ads(body, record.target))
+
+    elapsed = time.perf_counter() - started
+    print(f"Страниц в архиве: {pages}, объявлений: {ads}, время: {elapsed:.2f} сек")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# асинхронная загрузка множества страниц выдачи через aiohttp
+import asyncio
+from urllib.parse import urlparse
+
+import aiohttp
+
+from parsers.archive import archive_page
+from parsers.block_detector import classify_html
+from parsers.cookie_store import get_cookie_store
+from parsers.http_client import build_headers
+from parsers.http_client import get_user_agent_pool
+from parsers.page_cache import get_page_cache
+from parsers.rate_controller import get_rate_controller
+
+MAX_CONCURRENCY = 10  # Общий лимит одновременных запросов
+PER_HOST_CONCURRENCY = 2  # Лимит одновременных запросов к одному хосту
+REQUEST_TIMEOUT = 30
+
+
+class AsyncPageFetcher:
+    """Параллельная загрузка страниц с ограничением нагрузки на хост"""
+
+    def __init__(
+        self,
+        max_concurrency=MAX_CONCURRENCY,
+        per_host_concurrency=PER_HOST_CONCURRENCY,
+        timeout=REQUEST_TIMEOUT,
+        proxy=None,
+        use_cache=True,
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.proxy = proxy
+        self.user_agent_pool = get_user_agent_pool()
+        self.cache = get_page_cache() if use_cache else None
+
+        self._global_semaphore = None
+        self._host_semaphores = {}
+
+    def _host_semaphore(self, host):
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_semaphores[host]
+
+    async def fetch(self, session, url):
+        """Загрузка одной страницы, возвращает HTML или None"""
+        host = urlparse(url).netloc
+        rate_controller = get_rate_controller(host)
+
+        # Свежая страница из кэша не требует запроса. sqlite и распаковка - в потоке,
+        # чтобы не останавливать остальные загрузки в цикле событий
+        cached = await asyncio.to_thread(self.cache.get, url) if self.cache else None
+        if cached and cached.fresh:
+            return cached.body
+
+        headers = build_headers(self.user_agent_pool.random())
+        if cached:
+            headers.update(cached.conditional_headers())
+
+        async with self._global_semaphore, self._host_semaphore(host):
+            # Пауза между запросами к хосту ожидается без блокировки потока
+            await rate_controller.wait_async()
+
+            try:
+                async with session.get(
+                    url,
+                    headers=headers,
+                    proxy=self.proxy,
+                    cookies=get_cookie_store().as_dict(),
+                ) as response:
+                    if response.status == 304 and cached:
+                        rate_controller.record_success()
+                        await asyncio.to_thread(self.cache.refresh, url)
+                        return cached.body
+                    if response.status == 200:
+                        html = await response.text()
+                        verdict = classify_html(html)
+                        if not verdict.blocked:
+                            rate_controller.record_success()
+                            # Сжатие и запись на диск - в потоке, цикл событий не ждет
+                            await asyncio.to_thread(
+                                archive_page,
+                                url,
+                                html,
+                                response.status,
+                                dict(response.headers),
+                            )
+                            if self.cache:
+                                await asyncio.to_thread(
+                                    self.cache.put,
+                                    url,
+                                    html,
+                                    etag=response.headers.get("ETag"),
+                                    last_modified=response.headers.get("Last-Modified"),
+                                )
+                            return html
+                        rate_controller.record_block()
+                        print(f"Страница заблокирована ({verdict.reason}): {url}")
+                    elif response.status == 429:
+                        rate_controller.record_block()
+                        print(f"Обнаружена защита от ботов (429): {url}")
+                    else:
+                        print(f"Код ответа {response.status}: {url}")
+                    return None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Ошибка при запросе {url}: {e}")
+                return None
+
+    async def fetch_all(self, urls):
+        """Загрузка списка страниц, возвращает словарь {url: html или None}"""
+        self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._host_semaphores = {}
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.per_host_concurrency,
+        )
+
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            pages = await asyncio.gather(*(self.fetch(session, url) for url in urls))
+
+        return dict(zip(urls, pages))
+
+
+def fetch_pages(urls, **kwargs):
+    """Синхронная обертка для загрузки страниц из обычного кода"""
+    fetcher = AsyncPageFetcher(**kwargs)
+    return asyncio.run(fetcher.fetch_all(list(urls)))
@@ -0,0 +1,50 @@
+# проверка классификатора блокировок на сохраненных страницах и замер его скорости
+# Запуск: python -m parsers.benchmarks.block_detection
+import sys
+import time
+from pathlib import Path
+
+from parsers.block_detector import classify_html
+
+PAGES_DIR = Path(__file__).parent / "pages"
+ITERATIONS = 200
+LATENCY_BUDGET_MS = 5.0  # Допустимое время классификации одной страницы
+
+
+def load_corpus():
+    """Страницы blocked_*.html должны определяться как блокировка, остальные - нет"""
+    return [
+        (path.name, path.read_text(encoding="utf-8"), path.name.startswith("blocked_"))
+        for path in sorted(PAGES_DIR.glob("*.html"))
+    ]
+
+
+def main():
+    corpus = load_corpus()
+    errors = 0
+    worst_ms = 0.0
+
+    for name, html, expected in corpus:
+        verdict = classify_html(html)
+        if verdict.blocked != expected:
+            errors += 1
+            print(f"ОШИБКА {name}: ожидалось blocked={expected}, получено {verdict}")
+
+        started = time.perf_counter()
+        for _ in range(ITERATIONS):
+            classify_html(html)
+        elapsed_ms = (time.perf_counter() - started) * 1000 / ITERATIONS
+        worst_ms = max(worst_ms, elapsed_ms)
+
+        print(
+            f"{name:<22} {len(html) / 1024:7.1f} КБ  {elapsed_ms:6.3f} мс  "
+            f"{verdict.reason or '-'}",
+        )
+
+    print(f"Страниц: {len(corpus)}, ошибок: {errors}, худшее время: {worst_ms:.3f} мс")
+    if errors or worst_ms > LATENCY_BUDGET_MS:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# проверка холодного запуска приложения: импорт без обращений к БД и тяжелых модулей, бюджет времени
+# Запуск: python -m parsers.benchmarks.cold_start
+# Бюджеты в секундах: COLD_START_IMPORT_BUDGET, COLD_START_BOOT_BUDGET
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RUNS = 3  # Берется лучший запуск: первый может прогревать кэш файловой системы
+IMPORT_BUDGET = float(os.getenv("COLD_START_IMPORT_BUDGET", 3.0))
+BOOT_BUDGET = float(os.getenv("COLD_START_BOOT_BUDGET", 2.0))
+# Модули, которые нужны только парсерам и не должны загружаться вместе с приложением
+HEAVY_MODULES = ["selenium", "aiohttp", "bs4", "fake_useragent"]
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Выполняется в отдельном процессе: только так импорт действительно холодный
+PROBE = """
+import asyncio
+import json
+import os
+import sys
+import time
+
+started = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - started
+
+db_touched = os.path.exists(os.environ["COLD_START_DB_PATH"])
+heavy = [name for name in json.loads(os.environ["COLD_START_HEAVY"]) if name in sys.modules]
+
+
+async def boot():
+    async with main.lifespan(main.app):
+        pass
+
+
+started = time.perf_counter()
+asyncio.run(boot())
+boot_seconds = time.perf_counter() - started
+
+print(json.dumps({
+    "import_seconds": import_seconds,
+    "boot_seconds": boot_seconds,
+    "db_touched_on_import": db_touched,
+    "heavy_modules": heavy,
+    "phases": main.app.state.startup_timings,
+}))
+"""
+
+
+def run_probe(tmp_dir):
+    db_path = os.path.join(tmp_dir, "cold_start.sqlite")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    env = {
+        **os.environ,
+        "MYSQL_DATABASE_URL": f"sqlite:///{db_path}",
+        "COLD_START_DB_PATH": db_path,
+        "COLD_START_HEAVY": json.dumps(HEAVY_MODULES),
+        "SETTINGS_VERSION_FILE": os.path.join(tmp_dir, ".settings_version"),
+        "PYTHONPATH": str(REPO_ROOT),
+    }
+    # Рабочий каталог временный: лог приложения и метки не попадают в репозиторий
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=tmp_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(f"Приложение не запустилось, код {result.returncode}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    tmp_dir = tempfile.mkdtemp()
+    probes = [run_probe(tmp_dir) for _ in range(RUNS)]
+    best = min(probes, key=lambda probe: probe["import_seconds"] + probe["boot_seconds"])
+
+    print(f"Импорт main: {best['import_seconds']:.3f} сек (бюджет {IMPORT_BUDGET})")
+    print(f"Запуск lifespan: {best['boot_seconds']:.3f} сек (бюджет {BOOT_BUDGET})")
+    for name, seconds in best["phases"].items():
+        print(f"  {name}: {seconds:.3f} сек")
+
+    errors = []
+    if any(probe["db_touched_on_import"] for probe in probes):
+        errors.append("импорт приложения обращается к БД")
+    heavy = sorted({name for probe in probes for name in probe["heavy_modules"]})
+    if heavy:
+        errors.append(f"при импорте загружены модули парсеров: {', '.join(heavy)}")
+    if best["import_seconds"] > IMPORT_BUDGET:
+        errors.append(f"импорт дольше бюджета: {best['import_seconds']:.3f} сек")
+    if best["boot_seconds"] > BOOT_BUDGET:
+        errors.append(f"запуск дольше бюджета: {best['boot_seconds']:.3f} сек")
+
+    for error in errors:
+        print(f"ОШИБКА: {error}")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
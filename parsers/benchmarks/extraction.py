@@ -0,0 +1,60 @@
+# сравнение извлечения объявлений из встроенного JSON и разбора DOM через bs4
+# Запуск: python -m parsers.benchmarks.extraction
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from parsers.extractor import AVITO_URL
+from parsers.extractor import extract_ads
+
+PAGES_DIR = Path(__file__).parent / "pages"
+ITERATIONS = 50
+
+
+def extract_ads_bs4(html):
+    """Разбор карточек объявлений по DOM, как это делалось бы без JSON"""
+    soup = BeautifulSoup(html, "html.parser")
+    ads = []
+    for card in soup.select('[data-marker="item"]'):
+        title = card.select_one('[data-marker="item-title"]')
+        price = card.select_one('meta[itemprop="price"]')
+        date = card.select_one('[data-marker="item-date"]')
+        location = card.select_one(".geo-root span")
+        ads.append(
+            {
+                "id": int(card["data-item-id"]),
+                "title": title.get("title") if title else None,
+                "price": int(price["content"]) if price else None,
+                "url": AVITO_URL + title["href"] if title else None,
+                "date": date.get_text(strip=True) if date else None,
+                "location": location.get_text(strip=True) if location else None,
+            },
+        )
+    return ads
+
+
+def _measure(extract, html):
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        ads = extract(html)
+    return (time.perf_counter() - started) * 1000 / ITERATIONS, ads
+
+
+def main():
+    for path in sorted(PAGES_DIR.glob("listing_*.html")):
+        html = path.read_text(encoding="utf-8")
+
+        json_ms, json_ads = _measure(extract_ads, html)
+        dom_ms, dom_ads = _measure(extract_ads_bs4, html)
+
+        same_ids = [ad.id for ad in json_ads] == [ad["id"] for ad in dom_ads]
+        print(
+            f"{path.name:<18} JSON {json_ms:7.2f} мс ({len(json_ads)} шт.)  "
+            f"bs4 {dom_ms:7.2f} мс ({len(dom_ads)} шт.)  "
+            f"ускорение {dom_ms / json_ms:5.1f}x  id совпадают: {same_ids}",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# сравнение накладных расходов на страницу: старый путь get_page и PageFetcher
+# Запуск: python -m parsers.benchmarks.fetcher_overhead
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import requests
+from fake_useragent import UserAgent
+
+from parsers.http_client import build_headers
+from parsers.http_client import PageFetcher
+
+REQUESTS_COUNT = 200
+PAGE_BODY = b"<html><body>" + b"<div>ad</div>" * 500 + b"</body></html>"
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, как у настоящего сервера
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE_BODY)))
+        self.end_headers()
+        self.wfile.write(PAGE_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _old_path(url):
+    """Прежняя реализация: новый UserAgent и новое соединение на каждый запрос"""
+    ua = UserAgent()
+    return requests.get(url, headers=build_headers(ua.random), timeout=30)
+
+
+def _measure(name, fetch, url):
+    timings = []
+    for _ in range(REQUESTS_COUNT):
+        started = time.perf_counter()
+        fetch(url)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    print(
+        f"{name:<12} среднее {statistics.mean(timings):7.2f} мс, "
+        f"p50 {timings[len(timings) // 2]:7.2f} мс, "
+        f"p95 {timings[int(len(timings) * 0.95)]:7.2f} мс",
+    )
+    return statistics.mean(timings)
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+
+    try:
+        fetcher = PageFetcher()
+        old = _measure("requests.get", _old_path, url)
+        new = _measure("PageFetcher", fetcher.get, url)
+        print(f"Экономия на страницу: {old - new:.2f} мс ({old / new:.1f}x)")
+        fetcher.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
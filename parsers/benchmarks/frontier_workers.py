@@ -0,0 +1,106 @@
+# проверка очереди обхода: несколько обработчиков не загружают одну страницу дважды
+# Запуск: python -m parsers.benchmarks.frontier_workers
+# По умолчанию временная SQLite, для MySQL: FRONTIER_CHECK_DATABASE_URL=mysql+pymysql://...
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+WORKERS = 4
+PAGES = 200
+FETCH_DELAY = 0.005  # Имитация загрузки страницы
+SEARCH_URL = "https://www.avito.ru/moskva/kvartiry/prodam?cd=1"
+
+
+def main():
+    tmp_dir = tempfile.mkdtemp()
+    database_url = os.getenv(
+        "FRONTIER_CHECK_DATABASE_URL",
+        f"sqlite:///{os.path.join(tmp_dir, 'frontier.sqlite')}",
+    )
+    # database.py создает движок при импорте, поэтому адрес задается до импорта моделей
+    os.environ.setdefault("MYSQL_DATABASE_URL", database_url)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from database import Base
+    from parsers.frontier import claim_batch
+    from parsers.frontier import enqueue_search
+    from parsers.models import CrawlPage
+    from parsers.models import FrontierState
+    from parsers.worker import CrawlWorker
+
+    connect_args = {}
+    if database_url.startswith("sqlite"):
+        connect_args = {"check_same_thread": False, "timeout": 30}
+    engine = create_engine(database_url, connect_args=connect_args)
+    Base.metadata.drop_all(bind=engine, tables=[CrawlPage.__table__])
+    Base.metadata.create_all(bind=engine, tables=[CrawlPage.__table__])
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with session_factory() as db:
+        enqueue_search(db, SEARCH_URL, PAGES)
+        # Повторное добавление не должно создать дубликаты
+        enqueue_search(db, SEARCH_URL, PAGES)
+        # "Упавший" обработчик: аренда истекла сразу, страницы должны забрать другие
+        crashed = claim_batch(db, "crashed-worker", batch_size=10, lease_seconds=-1)
+
+    fetched = Counter()
+    lock = threading.Lock()
+
+    def fetch_page(url):
+        time.sleep(FETCH_DELAY)
+        with lock:
+            fetched[url] += 1
+        return "<html></html>"
+
+    workers = [
+        CrawlWorker(
+            fetch_page,
+            handle_page=lambda page, html: None,
+            worker_id=f"worker-{i}",
+            batch_size=5,
+            exit_when_idle=True,
+            session_factory=session_factory,
+        )
+        for i in range(WORKERS)
+    ]
+    threads = [threading.Thread(target=worker.run) for worker in workers]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with session_factory() as db:
+        total = db.query(CrawlPage).count()
+        done = db.query(CrawlPage).filter(CrawlPage.state == FrontierState.DONE).count()
+
+    duplicates = {url: count for url, count in fetched.items() if count > 1}
+    print(
+        f"Страниц в очереди: {total}, загружено: {len(fetched)}, готово: {done}, "
+        f"повторов: {len(duplicates)}, забрано у упавшего: {len(crashed)}, "
+        f"время: {elapsed:.2f} с"
+    )
+
+    errors = []
+    if total != PAGES:
+        errors.append(f"ожидалось {PAGES} страниц в очереди, получено {total}")
+    if duplicates:
+        errors.append(f"страницы загружены повторно: {list(duplicates)[:5]}")
+    if done != PAGES or len(fetched) != PAGES:
+        errors.append("не все страницы обработаны")
+
+    for error in errors:
+        print(f"ОШИБКА: {error}")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
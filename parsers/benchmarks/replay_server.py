@@ -0,0 +1,171 @@
+# локальный сервер, отдающий сохраненные страницы avito, блокировки и 429 с заданной задержкой
+# Запуск отдельно: python -m parsers.benchmarks.replay_server --port 8765 --latency 0.1
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+PAGES_DIR = Path(__file__).parent / "pages"
+SEARCH_PATH = "/kirovskaya_oblast_kirov/telefony"
+
+
+def load_pages(pages_dir=PAGES_DIR):
+    """Страницы выдачи по порядку и блокировки по имени (blocked_<имя>.html)"""
+    listings = [path.read_bytes() for path in sorted(pages_dir.glob("listing_*.html"))]
+    blocks = {
+        path.stem.removeprefix("blocked_"): path.read_bytes()
+        for path in sorted(pages_dir.glob("blocked_*.html"))
+    }
+    return listings, blocks
+
+
+class ReplayServer:
+    """Сервер записанных страниц для замеров без обращения к avito
+
+    Маршруты:
+        SEARCH_PATH?p=N - страница выдачи (сохраненные страницы по кругу)
+        /blocked/<имя> - страница блокировки blocked_<имя>.html
+        /429 - ответ 429 Too Many Requests
+
+    Задержка ответа - latency ± jitter секунд. На запросы выдачи с
+    вероятностью block_rate отдается случайная блокировка, с вероятностью
+    rate_limit_rate - ответ 429.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=0.05,
+        jitter=0.01,
+        block_rate=0.0,
+        rate_limit_rate=0.0,
+        seed=None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.block_rate = block_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.listings, self.blocks = load_pages()
+        self.requests_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def host(self):
+        """Хост с портом, как его видят контроллеры темпа"""
+        return self.base_url.removeprefix("http://")
+
+    def search_url(self, page):
+        return f"{self.base_url}{SEARCH_PATH}?cd=1&p={page}"
+
+    def _choose_response(self, path, query):
+        """(задержка, код ответа, тело) для запроса"""
+        with self._lock:
+            self.requests_count += 1
+            roll = self._random.random()
+            delay = self._random.uniform(self.latency - self.jitter, self.latency + self.jitter)
+            block_name = self._random.choice(list(self.blocks)) if self.blocks else None
+
+        delay = max(delay, 0.0)
+        if path == "/429":
+            return delay, 429, self.blocks.get("429", b"Too Many Requests")
+        if path.startswith("/blocked/"):
+            body = self.blocks.get(path.removeprefix("/blocked/"))
+            if body is None:
+                return delay, 404, b"Not Found"
+            return delay, 200, body
+        if path != SEARCH_PATH:
+            return delay, 404, b"Not Found"
+
+        if roll < self.rate_limit_rate:
+            return delay, 429, self.blocks.get("429", b"Too Many Requests")
+        if roll < self.rate_limit_rate + self.block_rate and block_name:
+            return delay, 200, self.blocks[block_name]
+
+        page = int(query.get("p", ["1"])[0] or 1)
+        return delay, 200, self.listings[(page - 1) % len(self.listings)]
+
+    def _handler_class(self):
+        server = self
+
+        class _ReplayHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, как у настоящего сервера
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                delay, status, body = server._choose_response(parts.path, parse_qs(parts.query))
+                time.sleep(delay)
+
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return _ReplayHandler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Работа в текущем потоке до KeyboardInterrupt"""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер записанных страниц avito")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Задержка ответа, сек")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--block-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = ReplayServer(
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        block_rate=args.block_rate,
+        rate_limit_rate=args.rate_limit_rate,
+    )
+    print(f"Сервер запущен: {server.search_url(1)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nСервер остановлен")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+# замер пропускной способности парсеров на локальном сервере записанных страниц
+# Запуск: python -m parsers.benchmarks.throughput [--selenium] [--save b.json] [--baseline b.json]
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from dataclasses import field
+
+from parsers.archive import disable_archive
+from parsers.async_fetcher import AsyncPageFetcher
+from parsers.benchmarks.replay_server import load_pages
+from parsers.benchmarks.replay_server import ReplayServer
+from parsers.block_detector import classify_html
+from parsers.browser_lifecycle import process_tree
+from parsers.extractor import extract_ads
+from parsers.parser_request import get_page
+from parsers.rate_controller import override_rate_controller
+
+PAGES = 100
+SELENIUM_PAGES = 20
+EXTRACTION_ITERATIONS = 200
+BENCH_RATE = 1000  # Темп запросов к локальному серверу, чтобы замерять парсер, а не паузы
+REGRESSION_TOLERANCE = 0.2  # Допустимое ухудшение относительно сохраненного замера
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+@dataclass
+class BenchResult:
+    name: str
+    pages: int
+    failures: int
+    wall_seconds: float
+    cpu_seconds: float
+    timings_ms: list = field(default_factory=list, repr=False)
+
+    @property
+    def pages_per_sec(self):
+        return self.pages / self.wall_seconds if self.wall_seconds else 0.0
+
+    def percentile(self, q):
+        if not self.timings_ms:
+            return 0.0
+        timings = sorted(self.timings_ms)
+        return timings[min(len(timings) - 1, int(len(timings) * q))]
+
+    @property
+    def cpu_ms_per_page(self):
+        return self.cpu_seconds * 1000 / self.pages if self.pages else 0.0
+
+    def summary(self):
+        return {
+            "pages": self.pages,
+            "failures": self.failures,
+            "pages_per_sec": round(self.pages_per_sec, 2),
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "cpu_ms_per_page": round(self.cpu_ms_per_page, 3),
+        }
+
+    def __str__(self):
+        s = self.summary()
+        return (
+            f"{self.name:<22} {s['pages']:>5} стр. {s['failures']:>4} ошиб.  "
+            f"{s['pages_per_sec']:8.1f} стр/с  p50 {s['p50_ms']:8.2f} мс  "
+            f"p95 {s['p95_ms']:8.2f} мс  CPU {s['cpu_ms_per_page']:7.2f} мс/стр"
+        )
+
+
+def _children_cpu_seconds(root_pid):
+    """Процессорное время процесса и потомков (Chrome) по /proc/<pid>/stat"""
+    total = 0
+    for pid in process_tree(root_pid):
+        try:
+            with open(f"/proc/{pid}/stat", encoding="utf-8", errors="replace") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        total += int(fields[11]) + int(fields[12])  # utime + stime
+    return total / _CLOCK_TICKS
+
+
+def _run_sequential(name, fetch, items, extra_cpu=None):
+    """Последовательный вызов fetch(item), fetch возвращает None при неудаче"""
+    timings, failures = [], 0
+    extra_before = extra_cpu() if extra_cpu else 0.0
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    for item in items:
+        call_started = time.perf_counter()
+        if fetch(item) is None:
+            failures += 1
+        timings.append((time.perf_counter() - call_started) * 1000)
+    wall = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    if extra_cpu:
+        cpu += extra_cpu() - extra_before
+    return BenchResult(name, len(items), failures, wall, cpu, timings)
+
+
+class _TimedAsyncFetcher(AsyncPageFetcher):
+    """Замер времени каждой страницы, включая ожидание свободного слота"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.timings_ms = []
+
+    async def fetch(self, session, url):
+        started = time.perf_counter()
+        html = await super().fetch(session, url)
+        self.timings_ms.append((time.perf_counter() - started) * 1000)
+        return html
+
+
+def bench_requests(server, pages):
+    urls = [server.search_url(page) for page in range(1, pages + 1)]
+    return _run_sequential(
+        "requests get_page",
+        lambda url: get_page(url, use_cache=False),
+        urls,
+    )
+
+
+def bench_async(server, pages):
+    urls = [server.search_url(page) for page in range(1, pages + 1)]
+    fetcher = _TimedAsyncFetcher(use_cache=False)
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    results = asyncio.run(fetcher.fetch_all(urls))
+    wall = time.perf_counter() - started
+    failures = sum(1 for html in results.values() if html is None)
+    return BenchResult(
+        "aiohttp fetch_all",
+        len(urls),
+        failures,
+        wall,
+        time.process_time() - cpu_started,
+        fetcher.timings_ms,
+    )
+
+
+def bench_selenium(server, pages):
+    """Chrome на локальном сервере: без прокси и с пустым хранилищем cookies"""
+    from parsers.browser_lifecycle import reap_orphans
+    from parsers.cookie_store import CookieStore
+    from parsers.parser_selenium import AvitoParser
+    from parsers.proxy_pool import ProxyPool
+
+    cookies_path = os.path.join(tempfile.mkdtemp(), "cookies.json")
+    parser = AvitoParser(
+        cookie_store=CookieStore(cookies_path),
+        collect_stats=False,
+        proxy_pool=ProxyPool(proxies=[None]),
+    )
+    try:
+        urls = [server.search_url(page) for page in range(1, pages + 1)]
+        # Chrome работает в отдельных процессах, их время учитывается отдельно
+        return _run_sequential(
+            "selenium get_page",
+            lambda url: parser.get_page(url, use_cache=False),
+            urls,
+            extra_cpu=lambda: _children_cpu_seconds(parser.lifecycle.pid),
+        )
+    finally:
+        parser.close()
+        reap_orphans()
+
+
+def bench_extraction(iterations):
+    listings, blocks = load_pages()
+    htmls = [page.decode("utf-8") for page in listings]
+    pages = [htmls[i % len(htmls)] for i in range(iterations)]
+    blocked = [page.decode("utf-8") for page in blocks.values()]
+    return [
+        _run_sequential("extract_ads", lambda html: extract_ads(html) or None, pages),
+        _run_sequential(
+            "classify_html",
+            lambda html: html if not classify_html(html).blocked else None,
+            pages + blocked,
+        ),
+    ]
+
+
+def compare_with_baseline(results, baseline_path, tolerance=REGRESSION_TOLERANCE):
+    """Список регрессий относительно сохраненного замера"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if not base:
+            continue
+        current = result.summary()
+        if current["pages_per_sec"] < base["pages_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{result.name}: {current['pages_per_sec']} стр/с, было {base['pages_per_sec']}",
+            )
+        if current["cpu_ms_per_page"] > base["cpu_ms_per_page"] * (1 + tolerance):
+            regressions.append(
+                f"{result.name}: CPU {current['cpu_ms_per_page']} мс/стр, "
+                f"было {base['cpu_ms_per_page']}",
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер пропускной способности парсеров")
+    parser.add_argument("--pages", type=int, default=PAGES)
+    parser.add_argument("--latency", type=float, default=0.02, help="Задержка сервера, сек")
+    parser.add_argument("--block-rate", type=float, default=0.05)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.02)
+    parser.add_argument("--selenium", action="store_true", help="Замерять и Chrome")
+    parser.add_argument("--selenium-pages", type=int, default=SELENIUM_PAGES)
+    parser.add_argument("--save", help="Сохранить результаты в JSON")
+    parser.add_argument("--baseline", help="Сравнить с сохраненными результатами")
+    args = parser.parse_args()
+
+    # Страницы локального сервера не нужны в архиве, а запись на диск исказила бы замер
+    disable_archive()
+    results = []
+    # Смешанный трафик: выдача, блокировки и 429, как у настоящего сайта
+    with ReplayServer(
+        latency=args.latency,
+        block_rate=args.block_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=1,
+    ) as server:
+        # Темп фиксирован: контроллер не должен растягивать паузы после блокировок
+        override_rate_controller(
+            server.host,
+            initial_rate=BENCH_RATE,
+            min_rate=BENCH_RATE,
+            max_rate=BENCH_RATE,
+            jitter=0,
+        )
+        results.append(bench_requests(server, args.pages))
+        results.append(bench_async(server, args.pages))
+
+    if args.selenium:
+        # Блокировка в браузере ведет к перезапуску с долгой паузой, поэтому без блокировок
+        with ReplayServer(latency=args.latency, seed=1) as server:
+            override_rate_controller(
+                server.host,
+                initial_rate=BENCH_RATE,
+                min_rate=BENCH_RATE,
+                max_rate=BENCH_RATE,
+                jitter=0,
+            )
+            results.append(bench_selenium(server, args.selenium_pages))
+
+    results.extend(bench_extraction(EXTRACTION_ITERATIONS))
+
+    for result in results:
+        print(result)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({r.name: r.summary() for r in results}, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены в {args.save}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline)
+        for regression in regressions:
+            print(f"РЕГРЕССИЯ {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
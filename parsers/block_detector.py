@@ -0,0 +1,96 @@
+# определение страницы блокировки по одному снимку HTML
+import re
+from dataclasses import dataclass
+
+# Все шаблоны компилируются один раз при импорте модуля
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+# Коды ошибок учитываются только в заголовке, а не в тексте объявлений
+_TITLE_BLOCK_RE = re.compile(
+    r"\b(?:403|429)\b|forbidden|too many requests|доступ\s+(?:временно\s+)?ограничен"
+    r"|не\s+робот|капча|captcha",
+    re.IGNORECASE,
+)
+
+# Текстовые признаки проверяются по странице в нижнем регистре. Каждый шаблон
+# начинается с фиксированного слова, поэтому re ищет его быстрым поиском подстроки
+_TEXT_BLOCK_RES = [
+    re.compile(r"доступ\s+(?:временно\s+)?ограничен"),
+    re.compile(r"превышено\s+количество\s+запросов"),
+    re.compile(r"подтвердите,?\s+что\s+вы\s+не\s+робот"),
+]
+
+# Аналог прежних XPath: элементы с классом captcha или id blocked
+_ELEMENT_MARKERS = [("captcha", "class"), ("blocked", "id")]
+_ATTR_TAIL_RES = {
+    attr: re.compile(rf"""\b{attr}\s*=\s*["'][^"'<>]*$""") for _, attr in _ELEMENT_MARKERS
+}
+_ATTR_LOOKBEHIND = 200  # Сколько символов перед словом смотреть в поиске атрибута
+
+
+def _find_element_marker(lower_html):
+    """Ищет слово внутри значения атрибута, не разбирая DOM"""
+    for word, attr in _ELEMENT_MARKERS:
+        position = lower_html.find(word)
+        while position != -1:
+            window = lower_html[max(0, position - _ATTR_LOOKBEHIND) : position]
+            if _ATTR_TAIL_RES[attr].search(window):
+                return f'{attr}="...{word}"'
+            position = lower_html.find(word, position + len(word))
+    return None
+
+
+@dataclass(frozen=True)
+class BlockVerdict:
+    blocked: bool
+    reason: str | None = None
+
+    def __bool__(self):
+        return self.blocked
+
+
+NOT_BLOCKED = BlockVerdict(False)
+
+
+def _classify_text(title, lower_text):
+    if title:
+        title_hit = _TITLE_BLOCK_RE.search(title)
+        if title_hit:
+            return BlockVerdict(True, f"заголовок: {title_hit.group(0)}")
+
+    for pattern in _TEXT_BLOCK_RES:
+        text_hit = pattern.search(lower_text)
+        if text_hit:
+            return BlockVerdict(True, f"текст: {text_hit.group(0)}")
+
+    return NOT_BLOCKED
+
+
+def classify_html(html):
+    """Проверка снимка страницы на блокировку, капчу и превышение лимита"""
+    if not html:
+        return BlockVerdict(True, "пустая страница")
+
+    title_match = _TITLE_RE.search(html)
+    lower_html = html.lower()
+    verdict = _classify_text(title_match.group(1) if title_match else None, lower_html)
+    if verdict.blocked:
+        return verdict
+
+    element_hit = _find_element_marker(lower_html)
+    if element_hit:
+        return BlockVerdict(True, f"элемент: {element_hit}")
+
+    return NOT_BLOCKED
+
+
+def classify_signals(title, text, block_element=None):
+    """Та же проверка по признакам, собранным в браузере без выгрузки HTML"""
+    verdict = _classify_text(title, (text or "").lower())
+    if verdict.blocked:
+        return verdict
+
+    if block_element:
+        return BlockVerdict(True, f"элемент: {block_element}")
+
+    return NOT_BLOCKED
@@ -0,0 +1,95 @@
+# извлечение объявлений и признаков блокировки внутри браузера за один вызов
+from dataclasses import dataclass
+from dataclasses import field
+
+from parsers.block_detector import BlockVerdict
+from parsers.block_detector import classify_signals
+from parsers.extractor import AdRecord
+from parsers.extractor import to_ad_record
+
+BLOCK_TEXT_LIMIT = 3000  # Сколько символов текста страницы отдавать для проверки
+
+# Скрипт повторяет логику parsers/extractor.py и возвращает только компактный JSON:
+# список объявлений с нужными полями и признаки блокировки
+EXTRACT_ADS_JS = """
+const textLimit = arguments[0];
+
+function findCatalog(root) {
+    const stack = [root];
+    while (stack.length) {
+        const node = stack.pop();
+        if (Array.isArray(node)) {
+            stack.push(...node);
+        } else if (node && typeof node === "object") {
+            if (Array.isArray(node.items) && node.items.some((i) => i && i.urlPath)) {
+                return node;
+            }
+            stack.push(...Object.values(node));
+        }
+    }
+    return null;
+}
+
+let catalog = null;
+for (const script of document.querySelectorAll('script[data-mfe-state="true"]')) {
+    try {
+        catalog = findCatalog(JSON.parse(script.textContent));
+    } catch (e) {}
+    if (catalog) break;
+}
+if (!catalog && typeof window.__initialData__ === "string") {
+    try {
+        catalog = findCatalog(JSON.parse(decodeURIComponent(window.__initialData__)));
+    } catch (e) {}
+}
+
+const items = (catalog ? catalog.items : [])
+    .filter((i) => i && i.id && i.urlPath)
+    .map((i) => ({
+        id: i.id,
+        title: i.title || "",
+        price: i.priceDetailed ? i.priceDetailed.value : (i.price ?? null),
+        urlPath: i.urlPath,
+        sortTimeStamp: i.sortTimeStamp || null,
+        location: {
+            name: (i.geo && i.geo.formattedAddress) || (i.location && i.location.name) || null,
+        },
+    }));
+
+const blockElement = document.querySelector('[class*="captcha" i], [id*="blocked" i]');
+
+return {
+    items: items,
+    totalCount: catalog ? (catalog.totalCount ?? catalog.count ?? null) : null,
+    title: document.title || "",
+    text: document.body ? document.body.innerText.slice(0, textLimit) : "",
+    blockElement: blockElement ? blockElement.tagName.toLowerCase() : null,
+};
+"""
+
+
+@dataclass
+class PageExtraction:
+    url: str
+    ads: list[AdRecord] = field(default_factory=list)
+    total_count: int | None = None
+    verdict: BlockVerdict = None
+
+
+def extract_in_browser(driver, url):
+    """Объявления и признаки блокировки текущей страницы одним execute_script"""
+    result = driver.execute_script(EXTRACT_ADS_JS, BLOCK_TEXT_LIMIT) or {}
+
+    verdict = classify_signals(
+        result.get("title"),
+        result.get("text"),
+        result.get("blockElement"),
+    )
+    ads = (to_ad_record(item, url) for item in result.get("items", []))
+
+    return PageExtraction(
+        url=url,
+        ads=[ad for ad in ads if ad],
+        total_count=result.get("totalCount"),
+        verdict=verdict,
+    )
@@ -0,0 +1,272 @@
+# жизненный цикл Chrome: перезапуск по числу страниц и памяти, добивание брошенных процессов
+import atexit
+import os
+import signal
+import threading
+import time
+
+MAX_PAGES_PER_DRIVER = int(os.getenv("MAX_PAGES_PER_DRIVER", 100))
+MAX_DRIVER_RSS_MB = int(os.getenv("MAX_DRIVER_RSS_MB", 1500))  # Память chromedriver и Chrome
+REAP_TIMEOUT = 5  # Сколько ждать завершения по SIGTERM перед SIGKILL, сек
+BROWSER_PROCESS_NAMES = ("chrome", "chromedriver", "chromium", "headless_shell")
+
+PROC_DIR = "/proc"
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# pid -> время запуска процессов chromedriver и Chrome: работающих драйверов и закрытых,
+# процессы которых пережили stop()
+_running_pids = {}
+_stopped_pids = {}
+_known_lock = threading.Lock()
+_atexit_registered = False
+
+
+def _read_stat(pid):
+    """(имя, состояние, pid родителя) из /proc/<pid>/stat или None, если процесса нет"""
+    try:
+        with open(f"{PROC_DIR}/{pid}/stat", encoding="utf-8", errors="replace") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # Имя в скобках может содержать пробелы, поэтому поля считаются от последней скобки
+    name = stat[stat.find("(") + 1 : stat.rfind(")")]
+    state, ppid = stat[stat.rfind(")") + 2 :].split()[:2]
+    return name, state, int(ppid)
+
+
+def _start_time(pid):
+    """Время запуска процесса в тиках от загрузки системы: отличает повторно выданный pid"""
+    try:
+        with open(f"{PROC_DIR}/{pid}/stat", encoding="utf-8", errors="replace") as f:
+            stat = f.read()
+        return int(stat[stat.rfind(")") + 2 :].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _snapshot(pids):
+    """{pid: время запуска} живых процессов"""
+    started = {pid: _start_time(pid) for pid in pids}
+    return {pid: at for pid, at in started.items() if at is not None}
+
+
+def _all_processes():
+    """{pid: (имя, состояние, pid родителя)} по всем процессам"""
+    processes = {}
+    try:
+        entries = os.listdir(PROC_DIR)
+    except OSError:
+        return processes
+    for entry in entries:
+        if entry.isdigit() and (stat := _read_stat(int(entry))):
+            processes[int(entry)] = stat
+    return processes
+
+
+def process_tree(root_pid, processes=None):
+    """pid процесса и всех его потомков"""
+    processes = processes if processes is not None else _all_processes()
+    children = {}
+    for pid, (_, _, ppid) in processes.items():
+        children.setdefault(ppid, []).append(pid)
+
+    tree = []
+    stack = [root_pid] if root_pid in processes else []
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, ()))
+    return tree
+
+
+def rss_bytes(pids):
+    """Суммарная резидентная память процессов по /proc/<pid>/statm"""
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"{PROC_DIR}/{pid}/statm", encoding="utf-8") as f:
+                total += int(f.read().split()[1]) * _PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+def driver_pid(driver):
+    """pid chromedriver, Chrome и его вкладки - потомки этого процесса"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def _is_alive(pid):
+    """Процесс существует и не завершился (зомби считается завершенным)"""
+    stat = _read_stat(pid)
+    return stat is not None and stat[1] not in ("Z", "X")
+
+
+def _collect_zombies(pids):
+    """Забирает статус завершившихся дочерних процессов, чтобы не копились зомби
+
+    Если процесс запущен как PID 1 (в контейнере), брошенные Chrome становятся
+    его потомками, и забирать нужно любые завершившиеся процессы.
+    """
+    targets = [-1] if os.getpid() == 1 else pids
+    for target in targets:
+        while True:
+            try:
+                pid, _ = os.waitpid(target, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0 or target != -1:
+                break
+
+
+def terminate(pids, timeout=REAP_TIMEOUT):
+    """SIGTERM, затем SIGKILL оставшимся, возвращает число добитых процессов"""
+    pids = [pid for pid in pids if pid != os.getpid()]
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    deadline = time.monotonic() + timeout
+    alive = pids
+    while alive and time.monotonic() < deadline:
+        _collect_zombies(alive)
+        alive = [pid for pid in alive if _is_alive(pid)]
+        if alive:
+            time.sleep(0.1)
+
+    for pid in alive:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    _collect_zombies(alive)
+    return len(pids)
+
+
+def _reap(known):
+    """Добивание записанных процессов браузеров и их потомков"""
+    processes = _all_processes()
+    # pid мог достаться другому процессу: свой процесс узнается по времени запуска
+    roots = [
+        pid for pid, started in known.items() if pid in processes and _start_time(pid) == started
+    ]
+    tree = {pid for root in roots for pid in process_tree(root, processes)}
+    pids = [
+        pid
+        for pid in tree
+        if processes[pid][0].startswith(BROWSER_PROCESS_NAMES) and _is_alive(pid)
+    ]
+    if pids:
+        print(f"Завершение брошенных процессов браузера: {len(pids)}")
+        terminate(pids)
+    return len(pids)
+
+
+def reap_orphans():
+    """Добивание процессов браузеров, переживших driver.quit()
+
+    Учитываются только процессы драйверов, для которых уже вызван stop(), и
+    их потомки. Браузеры работающих драйверов этого процесса (другие
+    AvitoParser и DriverPool) и браузеры других программ не затрагиваются.
+    """
+    with _known_lock:
+        known = dict(_stopped_pids)
+        _stopped_pids.clear()
+    return _reap(known)
+
+
+def _reap_at_exit():
+    """При завершении процесса добиваются и браузеры драйверов, которые не закрыли"""
+    with _known_lock:
+        known = {**_running_pids, **_stopped_pids}
+        _running_pids.clear()
+        _stopped_pids.clear()
+    _reap(known)
+
+
+class DriverLifecycle:
+    """Счетчик страниц и контроль памяти одного экземпляра Chrome
+
+    Решение о перезапуске принимается между страницами: recycle_reason()
+    вызывается перед следующей загрузкой, поэтому страница никогда
+    не прерывается на середине.
+    """
+
+    def __init__(self, max_pages=MAX_PAGES_PER_DRIVER, max_rss_mb=MAX_DRIVER_RSS_MB):
+        self.max_pages = max_pages
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self.pid = None
+        self.pages = 0
+        self.peak_rss_bytes = 0
+        self._pids = {}  # Процессы этого драйвера: pid -> время запуска
+
+    def _remember(self, pids):
+        """Запоминание процессов браузера, пока известен их родитель"""
+        new = _snapshot(pid for pid in pids if pid not in self._pids)
+        self._pids.update(new)
+        with _known_lock:
+            _running_pids.update(new)
+
+    def start(self, driver):
+        """Новый драйвер: сброс счетчиков и регистрация его процессов"""
+        global _atexit_registered
+
+        self.pid = driver_pid(driver)
+        self.pages = 0
+        self.peak_rss_bytes = 0
+        self._pids = {}
+        if self.pid:
+            self._remember(process_tree(self.pid))
+        with _known_lock:
+            if not _atexit_registered:
+                atexit.register(_reap_at_exit)
+                _atexit_registered = True
+
+    def record_page(self):
+        self.pages += 1
+
+    def rss_bytes(self):
+        """Память chromedriver со всеми процессами Chrome, 0 если /proc недоступен"""
+        if not self.pid:
+            return 0
+        tree = process_tree(self.pid)
+        # Потомки запоминаются, пока живы: после падения chromedriver их родителем станет init
+        self._remember(tree)
+        rss = rss_bytes(tree)
+        self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+        return rss
+
+    def recycle_reason(self):
+        """Причина перезапуска браузера или None"""
+        if self.max_pages and self.pages >= self.max_pages:
+            return f"загружено страниц: {self.pages}"
+        rss = self.rss_bytes()
+        if self.max_rss_bytes and rss >= self.max_rss_bytes:
+            return f"память {rss / 1024 / 1024:.0f} МБ"
+        return None
+
+    def stop(self, driver):
+        """driver.quit() и добивание процессов, которые после него остались"""
+        tree = process_tree(self.pid) if self.pid else []
+        self._remember(tree)
+        try:
+            driver.quit()
+        finally:
+            survivors = [pid for pid in tree if _is_alive(pid)]
+            if survivors:
+                print(f"После закрытия драйвера остались процессы: {len(survivors)}")
+                terminate(survivors)
+            _collect_zombies(tree)
+            # Процессы, ушедшие из дерева раньше (например, к init), добьет reap_orphans()
+            leftovers = {pid: at for pid, at in self._pids.items() if _is_alive(pid)}
+            with _known_lock:
+                for pid in self._pids:
+                    _running_pids.pop(pid, None)
+                _stopped_pids.update(leftovers)
+            self._pids = {}
+            self.pid = None
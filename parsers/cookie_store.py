@@ -0,0 +1,126 @@
+# общее хранилище cookies avito для Selenium и HTTP-клиента
+import json
+import os
+import threading
+from functools import lru_cache
+
+COOKIES_FILE = os.getenv("AVITO_COOKIES_FILE", "avito_cookies.json")
+COOKIE_DOMAIN = "avito.ru"
+
+
+def _cookie_key(cookie):
+    return cookie.get("domain", ""), cookie["name"], cookie.get("path", "/")
+
+
+class CookieStore:
+    """Cookies в памяти с номером версии и атомарной записью на диск
+
+    Версия растет при каждом изменении набора cookies. Файл перезаписывается
+    только если в памяти есть изменения, а читается только если на диске
+    версия новее - например, ее сохранил другой процесс.
+    """
+
+    def __init__(self, path=COOKIES_FILE):
+        self.path = path
+        self.version = 0
+        self._persisted_version = 0
+        self._cookies = {}
+        self._lock = threading.Lock()
+
+    def _read_file(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Ошибка чтения cookies {self.path}: {e}")
+            return None
+
+    def load(self):
+        """Подхватывает с диска более новую версию, возвращает True если cookies есть"""
+        data = self._read_file()
+        with self._lock:
+            if data and data.get("version", 0) > self.version:
+                self._cookies = {_cookie_key(c): c for c in data.get("cookies", [])}
+                self.version = self._persisted_version = data["version"]
+            return bool(self._cookies)
+
+    def save(self):
+        """Запись на диск, если есть несохраненные изменения"""
+        on_disk = self._read_file() or {}
+        with self._lock:
+            if self.version == self._persisted_version:
+                return
+
+            # Номер версии не должен уйти назад, если файл уже обновил другой процесс
+            self.version = max(self.version, on_disk.get("version", 0) + 1)
+            data = {"version": self.version, "cookies": list(self._cookies.values())}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._persisted_version = self.version
+
+    def update(self, cookies):
+        """Добавление cookies avito (формат Selenium), версия растет только при изменениях"""
+        with self._lock:
+            changed = False
+            for cookie in cookies:
+                if not cookie.get("domain", "").endswith(COOKIE_DOMAIN):
+                    continue
+                key = _cookie_key(cookie)
+                known = self._cookies.get(key)
+                # Cookie определяют домен, имя, путь и значение, остальные поля версию не меняют
+                if known is None or known.get("value") != cookie.get("value"):
+                    self._cookies[key] = dict(cookie)
+                    changed = True
+            if changed:
+                self.version += 1
+            return changed
+
+    def update_from_jar(self, jar):
+        """Добавление cookies из CookieJar requests, например response.cookies одного ответа"""
+        cookies = []
+        for cookie in jar:
+            item = {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "secure": cookie.secure,
+            }
+            if cookie.expires is not None:
+                item["expiry"] = cookie.expires
+            cookies.append(item)
+        return self.update(cookies)
+
+    def clear(self):
+        with self._lock:
+            if self._cookies:
+                self._cookies = {}
+                self.version += 1
+
+    def to_selenium(self):
+        """Cookies для driver.add_cookie, без срока действия"""
+        with self._lock:
+            return [
+                {k: v for k, v in cookie.items() if k != "expiry"}
+                for cookie in self._cookies.values()
+            ]
+
+    def as_dict(self):
+        """Имя -> значение для requests и aiohttp"""
+        with self._lock:
+            return {cookie["name"]: cookie["value"] for cookie in self._cookies.values()}
+
+    def __bool__(self):
+        return bool(self._cookies)
+
+
+@lru_cache(maxsize=1)
+def get_cookie_store():
+    """Общее хранилище cookies процесса, при первом обращении читается с диска"""
+    store = CookieStore()
+    store.load()
+    return store
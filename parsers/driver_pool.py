@@ -0,0 +1,180 @@
+# пул заранее прогретых драйверов Chrome для параллельной загрузки страниц
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import WebDriverException
+
+from parsers.archive import archive_page
+from parsers.browser_lifecycle import reap_orphans
+from parsers.parser_selenium import AvitoParser
+from parsers.parser_selenium import BASE_URL
+from parsers.parser_selenium import get_page_rate_controller
+from parsers.parser_selenium import MAX_RETRIES
+from parsers.parser_selenium import PAGE_RANGE
+from parsers.parser_selenium import PageBlockedError
+
+DRIVER_POOL_SIZE = 3  # Количество одновременно открытых браузеров
+CHECKOUT_TIMEOUT = 180  # Сколько ждать свободный драйвер, сек
+
+
+class DriverPool:
+    """Пул экземпляров AvitoParser с выдачей и возвратом драйверов
+
+    Сломанный драйвер закрывается и заменяется новым в фоне, поэтому
+    запросы не ждут холодного старта Chrome, пока в пуле есть живые драйверы.
+    """
+
+    def __init__(self, size=DRIVER_POOL_SIZE, parser_factory=AvitoParser):
+        self.size = size
+        self.parser_factory = parser_factory
+        self._idle = queue.Queue()
+        self._all = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._warmer = ThreadPoolExecutor(max_workers=size, thread_name_prefix="driver-warmer")
+
+        for _ in range(size):
+            self._warmer.submit(self._warm_one)
+
+    def _warm_one(self):
+        """Запуск нового браузера и добавление его в пул свободных"""
+        while not self._closed:
+            try:
+                parser = self.parser_factory()
+            except Exception as e:
+                print(f"Ошибка запуска драйвера: {e}")
+                time.sleep(random.uniform(5, 15))
+                continue
+
+            with self._lock:
+                closed = self._closed
+                if not closed:
+                    self._all.add(parser)
+
+            if closed:
+                parser.close()
+            else:
+                self._idle.put(parser)
+            return
+
+    def _discard(self, parser):
+        with self._lock:
+            self._all.discard(parser)
+        parser.close()
+
+    def _replace(self, parser):
+        self._discard(parser)
+        self._warm_one()
+
+    def checkout(self, timeout=CHECKOUT_TIMEOUT):
+        """Выдача свободного драйвера, ждет, пока он появится"""
+        return self._idle.get(timeout=timeout)
+
+    def checkin(self, parser, broken=False):
+        """Возврат драйвера в пул, сломанный или разросшийся заменяется новым в фоне"""
+        if self._closed:
+            self._discard(parser)
+            return
+
+        if not broken:
+            reason = parser.lifecycle.recycle_reason()
+            if reason:
+                print(f"Плановый перезапуск браузера: {reason}")
+                broken = True
+
+        if broken:
+            self._warmer.submit(self._replace, parser)
+        else:
+            self._idle.put(parser)
+
+    @contextmanager
+    def driver(self):
+        parser = self.checkout()
+        broken = False
+        try:
+            yield parser
+        except (PageBlockedError, TimeoutException, WebDriverException):
+            broken = True
+            raise
+        finally:
+            self.checkin(parser, broken=broken)
+
+    def get_page(self, url, extract=False):
+        """Загрузка страницы на любом свободном драйвере с повтором на другом
+
+        При extract=True возвращает PageExtraction с объявлениями, извлеченными
+        в браузере, вместо HTML страницы.
+        """
+        for attempt in range(1, MAX_RETRIES + 1):
+            get_page_rate_controller(url).wait()
+            try:
+                with self.driver() as parser:
+                    if extract:
+                        return parser.extract_page(url)
+                    html = parser.load_page(url)
+                archive_page(url, html)
+                return html
+            except PageBlockedError:
+                print(f"Блокировка на {url} (попытка {attempt}/{MAX_RETRIES})")
+            except (TimeoutException, WebDriverException) as e:
+                print(f"Ошибка драйвера на {url} (попытка {attempt}/{MAX_RETRIES}): {str(e)[:100]}")
+            except queue.Empty:
+                print(f"Нет свободного драйвера для {url}")
+                return None
+        return None
+
+    def _get_page_or_none(self, url, extract):
+        # Ошибка одной страницы не должна прерывать пачку и терять загруженные страницы
+        try:
+            return self.get_page(url, extract)
+        except Exception as e:
+            print(f"Страница {url} не получена: {type(e).__name__}: {str(e)[:100]}")
+            return None
+
+    def get_pages(self, urls, extract=False):
+        """Параллельная загрузка страниц, возвращает {url: html или None}"""
+        urls = list(urls)
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            pages = list(executor.map(lambda url: self._get_page_or_none(url, extract), urls))
+        return dict(zip(urls, pages))
+
+    def close(self):
+        """Закрытие всех браузеров пула"""
+        with self._lock:
+            self._closed = True
+            parsers = list(self._all)
+            self._all.clear()
+        self._warmer.shutdown(wait=True, cancel_futures=True)
+        for parser in parsers:
+            parser.close()
+        reap_orphans()
+
+
+def main():
+    pool = None
+    try:
+        pool = DriverPool()
+        urls = {page: f"{BASE_URL}{page}" for page in range(*PAGE_RANGE)}
+
+        pages = pool.get_pages(urls.values(), extract=True)
+        for page, url in urls.items():
+            if pages[url]:
+                print(f"Успешно получена страница {page}, объявлений: {len(pages[url].ads)}")
+            else:
+                print(f"Не удалось получить страницу {page}")
+
+    except KeyboardInterrupt:
+        print("\nПарсинг прерван пользователем")
+    finally:
+        if pool:
+            pool.close()
+        print("Парсинг завершен")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# извлечение объявлений из JSON-состояния, встроенного в страницу выдачи
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from urllib.parse import unquote
+from urllib.parse import urljoin
+
+AVITO_URL = "https://www.avito.ru"
+
+# Новая верстка: <script type="mime/invalid" data-mfe-state="true">{...}</script>
+MFE_STATE_MARKER = 'data-mfe-state="true"'
+# Старая верстка: window.__initialData__ = "<JSON в URL-кодировке>"
+INITIAL_DATA_MARKER = "window.__initialData__"
+
+_decoder = json.JSONDecoder()
+
+
+@dataclass(frozen=True)
+class AdRecord:
+    id: int
+    title: str
+    price: int | None
+    url: str
+    date: datetime | None
+    location: str | None
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "title": self.title,
+            "price": self.price,
+            "url": self.url,
+            "date": self.date.isoformat() if self.date else None,
+            "location": self.location,
+        }
+
+
+def _iter_mfe_states(html):
+    """JSON из всех скриптов data-mfe-state, разбор начинается прямо в строке страницы"""
+    position = html.find(MFE_STATE_MARKER)
+    while position != -1:
+        start = html.find(">", position) + 1
+        while start < len(html) and html[start].isspace():
+            start += 1
+        try:
+            state, _ = _decoder.raw_decode(html, start)
+            yield state
+        except json.JSONDecodeError:
+            pass
+        position = html.find(MFE_STATE_MARKER, start)
+
+
+def _initial_data_state(html):
+    position = html.find(INITIAL_DATA_MARKER)
+    if position == -1:
+        return None
+
+    start = html.find('"', position)
+    end = html.find('"', start + 1)
+    if start == -1 or end == -1:
+        return None
+
+    try:
+        return json.loads(unquote(html[start + 1 : end]))
+    except json.JSONDecodeError:
+        return None
+
+
+def _find_catalog(state):
+    """Ищет в состоянии словарь со списком объявлений items"""
+    stack = [state]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            items = node.get("items")
+            if isinstance(items, list) and any(
+                isinstance(item, dict) and "urlPath" in item for item in items
+            ):
+                return node
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return None
+
+
+def find_catalog(html):
+    """Каталог выдачи (items, totalCount, pager) из встроенного JSON или None"""
+    for state in _iter_mfe_states(html):
+        catalog = _find_catalog(state)
+        if catalog:
+            return catalog
+
+    state = _initial_data_state(html)
+    return _find_catalog(state) if state else None
+
+
+def _parse_price(item):
+    price = item.get("priceDetailed") or {}
+    value = price.get("value", item.get("price"))
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_date(item):
+    timestamp = item.get("sortTimeStamp")
+    return datetime.fromtimestamp(timestamp / 1000) if timestamp else None
+
+
+def _parse_location(item):
+    geo = item.get("geo") or {}
+    location = item.get("location") or {}
+    return geo.get("formattedAddress") or location.get("name")
+
+
+def to_ad_record(item, base_url=AVITO_URL):
+    """Преобразование элемента каталога в AdRecord, None для рекламы и баннеров"""
+    if "id" not in item or "urlPath" not in item:
+        return None
+
+    return AdRecord(
+        id=int(item["id"]),
+        title=item.get("title", ""),
+        price=_parse_price(item),
+        url=urljoin(base_url, item["urlPath"]),
+        date=_parse_date(item),
+        location=_parse_location(item),
+    )
+
+
+def extract_ads(html, base_url=AVITO_URL):
+    """Список объявлений со страницы выдачи без построения DOM"""
+    catalog = find_catalog(html)
+    if not catalog:
+        return []
+
+    ads = (to_ad_record(item, base_url) for item in catalog["items"] if isinstance(item, dict))
+    return [ad for ad in ads if ad]
+
+
+def extract_total_count(html):
+    """Общее количество объявлений в поиске по данным выдачи"""
+    catalog = find_catalog(html)
+    if not catalog:
+        return None
+    return catalog.get("totalCount") or catalog.get("count")
@@ -0,0 +1,263 @@
+# очередь обхода страниц в БД: возобновляемый обход без повторов
+import logging
+import os
+import socket
+from datetime import datetime
+from datetime import timedelta
+
+from sqlalchemy import and_
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from parsers.incremental import search_key
+from parsers.models import CrawlPage
+from parsers.models import FrontierState
+from parsers.urls import url_hash
+from parsers.urls import with_page
+
+logger = logging.getLogger(__name__)
+
+CLAIM_BATCH_SIZE = 10
+LEASE_SECONDS = 5 * 60  # Сколько страница закреплена за обработчиком
+MAX_ATTEMPTS = 3
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_search(
+    db: Session,
+    search_url: str,
+    pages: int,
+    priority: int = 0,
+    task_id: int | None = None,
+    refresh: bool = False,
+) -> int:
+    """
+    Добавление страниц поиска в очередь, уже добавленные ссылки пропускаются
+
+    Страница в очереди одна на ссылку: задачи с одинаковым поиском обходят
+    общие страницы, при повторной постановке страница переходит к последней
+    задаче. Объявления хранятся без повторов по id, поэтому от того, какая
+    задача указана у страницы, зависит только source_task_id новых объявлений.
+
+    Args:
+        db: Сессия базы данных
+        search_url: Ссылка на поиск
+        pages: Количество страниц, начиная с первой
+        priority: Приоритет обхода
+        task_id: Задача, к которой относятся объявления поиска
+        refresh: Вернуть в очередь уже обойденные страницы (повторный обход)
+
+    Returns:
+        Количество добавленных страниц
+    """
+    base_url = search_key(search_url)
+    candidates = {}
+    for page in range(1, pages + 1):
+        url = with_page(base_url, page)
+        candidates[url_hash(url)] = (page, url)
+
+    existing = {
+        page.url_hash: page
+        for page in db.query(CrawlPage).filter(CrawlPage.url_hash.in_(list(candidates)))
+    }
+
+    added = 0
+    for hash_, (page, url) in candidates.items():
+        known = existing.get(hash_)
+        if known is not None:
+            if refresh and known.state in (FrontierState.DONE, FrontierState.FAILED):
+                known.state = FrontierState.PENDING
+                known.attempts = 0
+                known.last_error = None
+                known.priority = priority
+                known.task_id = task_id if task_id is not None else known.task_id
+                added += 1
+            continue
+        db.add(
+            CrawlPage(
+                search_url=base_url,
+                page=page,
+                url=url,
+                url_hash=hash_,
+                priority=priority,
+                task_id=task_id,
+            ),
+        )
+        added += 1
+
+    db.commit()
+    logger.info(f"В очередь обхода добавлено {added} страниц поиска {base_url}")
+    return added
+
+
+def _claimable(now):
+    """Страницы в очереди и страницы с истекшей арендой"""
+    return or_(
+        CrawlPage.state == FrontierState.PENDING,
+        and_(CrawlPage.state == FrontierState.LEASED, CrawlPage.lease_expires_at < now),
+    )
+
+
+def _owned(worker_id):
+    return and_(CrawlPage.state == FrontierState.LEASED, CrawlPage.lease_owner == worker_id)
+
+
+def claim_batch(
+    db: Session,
+    worker_id: str,
+    batch_size: int = CLAIM_BATCH_SIZE,
+    lease_seconds: int = LEASE_SECONDS,
+) -> list[CrawlPage]:
+    """
+    Закрепление пачки страниц за обработчиком на время аренды
+
+    В MySQL строки выбираются через SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+    параллельные обработчики не ждут друг друга и не получают одни и те же
+    страницы. Обновление повторно проверяет условие выборки - это защищает и
+    в базах без SKIP LOCKED (например, SQLite), где блокировка строк игнорируется.
+    """
+    now = datetime.utcnow()
+    ids = [
+        page_id
+        for (page_id,) in db.query(CrawlPage.id)
+        .filter(_claimable(now))
+        .order_by(CrawlPage.priority.desc(), CrawlPage.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ]
+    if not ids:
+        db.commit()
+        return []
+
+    db.query(CrawlPage).filter(CrawlPage.id.in_(ids), _claimable(now)).update(
+        {
+            "state": FrontierState.LEASED,
+            "lease_owner": worker_id,
+            "lease_expires_at": now + timedelta(seconds=lease_seconds),
+            "attempts": CrawlPage.attempts + 1,
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+
+    # Страницы, которые между выборкой и обновлением успел забрать другой обработчик, отсеются
+    return (
+        db.query(CrawlPage)
+        .filter(CrawlPage.id.in_(ids), _owned(worker_id))
+        .order_by(CrawlPage.priority.desc(), CrawlPage.id)
+        .all()
+    )
+
+
+def heartbeat(db: Session, worker_id: str, lease_seconds: int = LEASE_SECONDS) -> int:
+    """Продление аренды всех страниц обработчика, возвращает их количество"""
+    extended = (
+        db.query(CrawlPage)
+        .filter(_owned(worker_id))
+        .update(
+            {"lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return extended
+
+
+def _finish(db: Session, page: CrawlPage, worker_id: str, values: dict) -> bool:
+    """Изменение страницы, только если аренда все еще у этого обработчика"""
+    values = {**values, "lease_owner": None, "lease_expires_at": None}
+    updated = (
+        db.query(CrawlPage)
+        .filter(CrawlPage.id == page.id, _owned(worker_id))
+        .update(values, synchronize_session=False)
+    )
+    db.commit()
+    if not updated:
+        logger.warning(f"Аренда страницы {page.url} истекла и передана другому обработчику")
+    return bool(updated)
+
+
+def complete(db: Session, page: CrawlPage, worker_id: str) -> bool:
+    return _finish(db, page, worker_id, {"state": FrontierState.DONE})
+
+
+def fail(
+    db: Session,
+    page: CrawlPage,
+    worker_id: str,
+    error: str,
+    max_attempts: int = MAX_ATTEMPTS,
+) -> bool:
+    """Неудачная попытка: страница возвращается в очередь или помечается ошибкой"""
+    state = FrontierState.FAILED if page.attempts >= max_attempts else FrontierState.PENDING
+    return _finish(db, page, worker_id, {"state": state, "last_error": error})
+
+
+def release(db: Session, worker_id: str) -> int:
+    """Возврат в очередь всех страниц обработчика, например, при остановке"""
+    released = (
+        db.query(CrawlPage)
+        .filter(_owned(worker_id))
+        .update(
+            {"state": FrontierState.PENDING, "lease_owner": None, "lease_expires_at": None},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return released
+
+
+def drain(
+    db: Session,
+    fetch_page,
+    worker_id: str | None = None,
+    batch_size: int = CLAIM_BATCH_SIZE,
+):
+    """
+    Обход очереди до опустошения
+
+    Args:
+        db: Сессия базы данных
+        fetch_page: Функция url -> HTML или None
+        worker_id: Идентификатор обработчика
+        batch_size: Сколько страниц закреплять за раз
+
+    Yields:
+        (CrawlPage, HTML) для каждой успешно загруженной страницы
+    """
+    worker_id = worker_id or default_worker_id()
+    try:
+        while pages := claim_batch(db, worker_id, batch_size):
+            for page in pages:
+                html = fetch_page(page.url)
+                if html is None:
+                    fail(db, page, worker_id, "Страница не получена")
+                    continue
+                yield page, html
+                complete(db, page, worker_id)
+    finally:
+        # При остановке или ошибке незавершенные страницы сразу возвращаются в очередь
+        release(db, worker_id)
+
+
+def main():
+    from parsers.parser_request import get_page
+    from parsers.parser_selenium import BASE_URL
+
+    db = SessionLocal()
+    try:
+        enqueue_search(db, BASE_URL, pages=2)
+        for page, html in drain(db, get_page):
+            print(f"Успешно получена страница {page.page} поиска {page.search_url}")
+    except KeyboardInterrupt:
+        print("\nОбход прерван, страницы вернутся в очередь при следующем запуске")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# переиспользуемые HTTP-сессии и пул User-Agent для парсера на requests
+import random
+import threading
+from functools import lru_cache
+
+import requests
+from fake_useragent import UserAgent
+from requests.adapters import HTTPAdapter
+
+USER_AGENT_POOL_SIZE = 50  # Сколько User-Agent заранее загрузить в память
+POOL_MAXSIZE = 10  # Максимум keep-alive соединений на хост в одной сессии
+REQUEST_TIMEOUT = 30
+
+# Запасной набор на случай, если fake_useragent не смог загрузить данные
+FALLBACK_USER_AGENTS = [
+    "Mozilla/5.0 (Linux; Android 10; SM-A505FN) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36",  # noqa E501
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 15_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Mobile/15E148 Safari/604.1",  # noqa E501
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",  # noqa E501
+]
+
+DEFAULT_HEADERS = {
+    "X-Requested-With": "XMLHttpRequest",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Referer": "https://www.avito.ru/",
+}
+
+
+class UserAgentPool:
+    """Ротация User-Agent из списка, загруженного один раз"""
+
+    def __init__(self, user_agents):
+        self.user_agents = list(user_agents) or FALLBACK_USER_AGENTS
+
+    def random(self):
+        return random.choice(self.user_agents)
+
+
+@lru_cache(maxsize=1)
+def get_user_agent_pool(size=USER_AGENT_POOL_SIZE):
+    """Пул User-Agent на весь процесс, fake_useragent читается только здесь"""
+    try:
+        ua = UserAgent()
+        user_agents = {ua.random for _ in range(size)}
+    except Exception as e:
+        print(f"Ошибка загрузки User-Agent, используется запасной список: {e}")
+        user_agents = FALLBACK_USER_AGENTS
+    return UserAgentPool(user_agents)
+
+
+def build_headers(user_agent):
+    """Заголовки запроса к avito с заданным User-Agent"""
+    return {"User-Agent": user_agent, **DEFAULT_HEADERS}
+
+
+def proxy_key(proxy):
+    """Ключ пула соединений: одна сессия на каждый прокси"""
+    if not proxy:
+        return None
+    return proxy.get("https") or proxy.get("http")
+
+
+class PageFetcher:
+    """Загрузчик страниц с keep-alive пулами соединений, по одному на прокси"""
+
+    def __init__(self, pool_maxsize=POOL_MAXSIZE, user_agent_pool=None):
+        self.pool_maxsize = pool_maxsize
+        self.user_agent_pool = user_agent_pool or get_user_agent_pool()
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _create_session(self, proxy):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_maxsize, pool_maxsize=self.pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if proxy:
+            session.proxies.update(proxy)
+        return session
+
+    def session_for(self, proxy=None):
+        """Сессия для прокси, создается при первом обращении"""
+        key = proxy_key(proxy)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._create_session(proxy)
+                self._sessions[key] = session
+        return session
+
+    def headers(self):
+        return build_headers(self.user_agent_pool.random())
+
+    def get(self, url, proxy=None, headers=None, timeout=REQUEST_TIMEOUT, **kwargs):
+        """GET-запрос через сессию прокси, возвращает requests.Response"""
+        return self.session_for(proxy).get(
+            url,
+            headers=headers or self.headers(),
+            timeout=timeout,
+            **kwargs,
+        )
+
+    def close(self):
+        """Закрытие всех пулов соединений"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+@lru_cache(maxsize=1)
+def get_fetcher():
+    """Общий загрузчик страниц для процесса"""
+    return PageFetcher()
@@ -0,0 +1,99 @@
+# гибридный режим: браузер только получает сессию, страницы грузятся HTTP-клиентом
+import time
+
+from parsers.cookie_store import get_cookie_store
+from parsers.extractor import extract_ads
+from parsers.http_client import get_fetcher
+from parsers.incremental import crawl_incremental
+from parsers.parser_request import get_page
+from parsers.proxy_pool import as_requests_proxies
+
+SESSION_URL = "https://m.avito.ru"
+SESSION_TTL = 30 * 60  # Через сколько секунд получать сессию в браузере заново
+
+
+class HybridFetcher:
+    """Загрузка страниц через requests с cookies, полученными в Chrome
+
+    Браузер запускается только для получения сессии: при первом запросе,
+    по истечении SESSION_TTL и после неудачного запроса.
+    """
+
+    def __init__(self, cookie_store=None, session_ttl=SESSION_TTL):
+        self.cookie_store = cookie_store if cookie_store is not None else get_cookie_store()
+        self.session_ttl = session_ttl
+        self.user_agent = None
+        self.proxy = None
+        self._session_started = None
+
+    def _session_expired(self):
+        return (
+            self._session_started is None
+            or time.monotonic() - self._session_started > self.session_ttl
+        )
+
+    def refresh_session(self):
+        """Открывает сайт в браузере и забирает его cookies, User-Agent и прокси"""
+        # selenium загружается только когда действительно нужен браузер
+        from parsers.parser_selenium import AvitoParser
+
+        print("Получение сессии в браузере...")
+        parser = AvitoParser(cookie_store=self.cookie_store, collect_stats=False)
+        try:
+            parser.driver.get(SESSION_URL)
+            self.user_agent = parser.user_agent
+            previous_proxy, self.proxy = self.proxy, parser.current_proxy
+        finally:
+            # close() передает cookies браузера в хранилище и сохраняет их
+            parser.close()
+        # Cookies прошлой сессии в сессиях requests не должны перекрыть свежие из браузера
+        fetcher = get_fetcher()
+        for proxy in {previous_proxy, self.proxy}:
+            fetcher.session_for(as_requests_proxies(proxy)).cookies.clear()
+        self._session_started = time.monotonic()
+
+    def _fetch(self, url):
+        html = get_page(
+            url,
+            proxy=as_requests_proxies(self.proxy),
+            user_agent=self.user_agent,
+            cookie_store=self.cookie_store,
+        )
+        # Cookies, обновленные сайтом через Set-Cookie, нужны следующим запросам и браузеру
+        self.cookie_store.save()
+        return html
+
+    def get_page(self, url):
+        if self._session_expired():
+            self.refresh_session()
+
+        html = self._fetch(url)
+        if html is None:
+            # Сессия могла устареть или попасть под блокировку - обновляем и повторяем
+            self.refresh_session()
+            html = self._fetch(url)
+        return html
+
+
+def main():
+    from parsers.parser_selenium import BASE_URL
+    from parsers.parser_selenium import PAGE_RANGE
+
+    fetcher = HybridFetcher()
+    urls = [f"{BASE_URL}{page}" for page in range(*PAGE_RANGE)]
+
+    def fetch_batch(batch):
+        pages = {url: fetcher.get_page(url) for url in batch}
+        return {url: extract_ads(html, url) if html else None for url, html in pages.items()}
+
+    try:
+        for url, ads, new_ads in crawl_incremental(urls, fetch_batch):
+            print(f"Страница {url}: объявлений {len(ads)}, новых {len(new_ads)}")
+    except KeyboardInterrupt:
+        print("\nПарсинг прерван пользователем")
+    finally:
+        print("Парсинг завершен")
+
+
+if __name__ == "__main__":
+    main()
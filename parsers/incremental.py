@@ -0,0 +1,138 @@
+# инкрементальный обход поиска: остановка на странице, где все объявления уже известны
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
+
+from parsers.urls import normalize_url
+from parsers.urls import PAGE_PARAM
+
+CRAWL_STATE_FILE = os.getenv("CRAWL_STATE_FILE", "crawl_state.json")
+KNOWN_IDS_LIMIT = 5000  # Сколько последних id хранить на один поиск
+
+
+def search_key(url):
+    """Ключ поиска: нормализованная ссылка без номера страницы"""
+    parts = urlsplit(normalize_url(url))
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != PAGE_PARAM]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class CrawlState:
+    """Отметка максимального id и последние известные id по каждому поиску
+
+    Объявление с id больше отметки прошлого обхода - новое. С id не больше
+    отметки - известное, только если оно есть среди сохраненных id: старое
+    поднятое объявление, которого раньше не видели, считается новым. Если
+    список сохраненных id обрезан до KNOWN_IDS_LIMIT, id меньше самого
+    старого из них проверить нельзя, и они считаются известными.
+    """
+
+    def __init__(self, path=CRAWL_STATE_FILE):
+        self.path = path
+        self._searches = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._searches is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._searches = json.load(f)
+            except FileNotFoundError:
+                self._searches = {}
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Ошибка чтения состояния обхода {self.path}: {e}")
+                self._searches = {}
+        return self._searches
+
+    def known_checker(self, key):
+        """Функция проверки id для поиска, считает отметку один раз"""
+        with self._lock:
+            search = self._load().get(key)
+        if not search:
+            return lambda ad_id: False
+
+        max_id = search["max_id"]
+        known_ids = set(search["known_ids"])
+        # Ниже этой границы id уже вытеснены из списка, и сверять их не с чем
+        floor = min(known_ids) if len(known_ids) >= KNOWN_IDS_LIMIT else 0
+        return lambda ad_id: ad_id <= max_id and (ad_id in known_ids or ad_id < floor)
+
+    def update(self, key, ad_ids):
+        """Добавляет id, увиденные в завершенном обходе, и сохраняет файл"""
+        if not ad_ids:
+            return
+
+        with self._lock:
+            searches = self._load()
+            search = searches.get(key, {"max_id": 0, "known_ids": []})
+            known_ids = list(dict.fromkeys([*ad_ids, *search["known_ids"]]))
+            searches[key] = {
+                "max_id": max(search["max_id"], *ad_ids),
+                "known_ids": known_ids[:KNOWN_IDS_LIMIT],
+                "updated_at": time.time(),
+            }
+            self._save()
+
+    def _save(self):
+        """Атомарная запись: сначала во временный файл, затем замена"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._searches, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def crawl_incremental(page_urls, fetch_batch, batch_size=1, state=None):
+    """Обход страниц поиска по порядку до первой страницы без новых объявлений
+
+    Первая пачка - одна страница, следующие вдвое больше предыдущей до
+    batch_size. Обычно уже первая страница целиком известна, и обход
+    заканчивается одной загрузкой, а глубокий обход все равно идет параллельно.
+
+    Args:
+        page_urls: Ссылки на страницы одного поиска по порядку
+        fetch_batch: Функция, принимающая список ссылок и возвращающая
+            {url: список AdRecord или None}
+        batch_size: Наибольшее число страниц, загружаемых за раз
+        state: CrawlState, по умолчанию общий файл состояния
+
+    Yields:
+        (url, все объявления страницы, новые объявления страницы)
+    """
+    page_urls = list(page_urls)
+    if not page_urls:
+        return
+
+    state = state or CrawlState()
+    key = search_key(page_urls[0])
+    is_known = state.known_checker(key)
+    seen_ids = []
+
+    start, size = 0, 1
+    while start < len(page_urls):
+        batch = page_urls[start : start + size]
+        start += len(batch)
+        size = min(size * 2, max(batch_size, 1))
+        results = fetch_batch(batch)
+
+        for url in batch:
+            ads = results.get(url)
+            if ads is None:
+                # Страница не загрузилась: отметку не двигаем, чтобы не потерять объявления
+                print(f"Обход остановлен, страница не получена: {url}")
+                return
+
+            new_ads = [ad for ad in ads if not is_known(ad.id)]
+            seen_ids.extend(ad.id for ad in ads)
+            yield url, ads, new_ads
+
+            if not new_ads:
+                print(f"Новых объявлений нет, обход остановлен на {url}")
+                state.update(key, seen_ids)
+                return
+
+    state.update(key, seen_ids)
@@ -0,0 +1,132 @@
+# сохранение объявлений, полученных парсерами, сразу в БД без выгрузки через Google таблицу
+# Запуск: python -m parsers.ingest
+import hashlib
+import logging
+
+from sqlalchemy.orm import Session
+
+from app_settings.models import Settings
+from database import SessionLocal
+from eshmakar_connector.models import Task
+from eshmakar_connector.models import TaskStatus
+from google_sheet.service import save_rows
+from parsers.extractor import extract_ads
+from parsers.frontier import enqueue_search
+
+logger = logging.getLogger(__name__)
+
+
+PARSER_SOURCE_PREFIX = "parser-task-"  # sheet_id для строк, полученных парсерами
+
+
+def source_id(task_id: int) -> str:
+    """Источник строк в google_sheet_records: задача, для которой работал парсер"""
+    return f"{PARSER_SOURCE_PREFIX}{task_id}"
+
+
+def ad_row_hash(row: dict) -> str:
+    """Хэш строки объявления по его id: поднятое или переоцененное объявление - не новая строка"""
+    return hashlib.md5(f"avito-ad:{row['id']}".encode()).hexdigest()
+
+
+def ingest_ads(db: Session, ads, task_id: int) -> int:
+    """
+    Сохранение объявлений задачи с тем же отсевом повторов, что и для Google таблиц
+
+    Повторы отсеиваются по id объявления, строки отличаются от строк таблиц
+    значением sheet_id с префиксом PARSER_SOURCE_PREFIX.
+
+    Args:
+        db: Сессия базы данных
+        ads: Список AdRecord
+        task_id: ID задачи
+
+    Returns:
+        Количество добавленных записей
+    """
+    if not ads:
+        return 0
+    rows = [ad.as_dict() for ad in ads]
+    new_records = save_rows(db, rows, source_id(task_id), task_id, key=ad_row_hash)
+    db.commit()
+    return new_records
+
+
+def ingest_page(page, html, session_factory=SessionLocal) -> int:
+    """
+    Обработчик страницы для CrawlWorker: объявления сохраняются, как только страница получена
+
+    Страницы без задачи только выводят количество объявлений.
+    """
+    ads = extract_ads(html, page.url)
+    if page.task_id is None:
+        print(f"Страница {page.page} поиска {page.search_url}: объявлений {len(ads)}")
+        return 0
+
+    db = session_factory()
+    try:
+        new_records = ingest_ads(db, ads, page.task_id)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    logger.info(
+        f"Задача {page.task_id}, страница {page.page}: объявлений {len(ads)}, "
+        f"новых записей {new_records}",
+    )
+    return new_records
+
+
+def enqueue_task(db: Session, task: Task, pages: int | None = None, priority: int = 0) -> int:
+    """Постановка поиска задачи в очередь обхода, уже обойденные страницы обходятся заново"""
+    pages = pages or Settings.get_count_of_page_to_parse()
+    return enqueue_search(
+        db,
+        task.link_to_parse,
+        pages,
+        priority=priority,
+        task_id=task.id,
+        refresh=True,
+    )
+
+
+def enqueue_active_tasks(db: Session) -> int:
+    """Постановка в очередь обхода всех задач в работе"""
+    tasks = (
+        db.query(Task)
+        .filter(
+            Task.status == TaskStatus.IN_PROGRESS,
+            Task.link_to_parse.isnot(None),
+            Task.link_to_parse != "",
+        )
+        .all()
+    )
+    pages = Settings.get_count_of_page_to_parse()
+    enqueued = sum(enqueue_task(db, task, pages) for task in tasks)
+    logger.info(f"Задач поставлено в очередь обхода: {len(tasks)}, страниц: {enqueued}")
+    return enqueued
+
+
+def main():
+    from parsers.parser_request import get_page
+    from parsers.worker import CrawlWorker
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    db = SessionLocal()
+    try:
+        enqueue_active_tasks(db)
+    finally:
+        db.close()
+
+    # Обход до опустошения очереди, объявления попадают в БД постранично
+    CrawlWorker(get_page, handle_page=ingest_page, exit_when_idle=True).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from datetime import datetime
+from enum import Enum as PyEnum
+
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import Enum
+from sqlalchemy import ForeignKey
+from sqlalchemy import Index
+from sqlalchemy import Integer
+from sqlalchemy import String
+from sqlalchemy import Text
+
+from database import Base
+
+
+class FrontierState(PyEnum):
+    PENDING = "В ОЧЕРЕДИ"
+    LEASED = "В РАБОТЕ"
+    DONE = "ГОТОВО"
+    FAILED = "ОШИБКА"
+
+
+class CrawlPage(Base):
+    """Страница поиска в очереди обхода"""
+
+    __tablename__ = "crawl_frontier"
+
+    id = Column(Integer, primary_key=True)
+    search_url = Column(Text, nullable=False)  # Ссылка на поиск без номера страницы
+    page = Column(Integer, nullable=False)
+    url = Column(Text, nullable=False)
+    url_hash = Column(String(64), unique=True, nullable=False)  # SHA-256 нормализованной ссылки
+    state = Column(Enum(FrontierState), default=FrontierState.PENDING, nullable=False)
+    priority = Column(Integer, default=0, nullable=False)  # Чем больше, тем раньше обход
+    attempts = Column(Integer, default=0, nullable=False)
+    lease_owner = Column(String(64), nullable=True)  # Идентификатор обработчика
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    # Задача, для которой обходится поиск: объявления сохраняются с ее id. Страница
+    # одна на ссылку, у задач с одинаковым поиском она общая и хранит последнюю задачу
+    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Выборка следующей пачки: состояние, затем приоритет и порядок добавления
+        Index("ix_frontier_claim", "state", "priority", "id"),
+        Index("ix_frontier_lease", "state", "lease_expires_at"),
+    )
+
@@ -0,0 +1,202 @@
+# дисковый кэш страниц: сжатые тела по хэшу содержимого, индекс в sqlite
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from parsers.urls import is_listing_url
+from parsers.urls import normalize_url
+
+CACHE_DIR = os.getenv("PAGE_CACHE_DIR", ".page_cache")
+CACHE_TTL = 6 * 60 * 60  # Сколько секунд страница объявления считается свежей
+# Выдача меняется постоянно: долгий TTL скрыл бы новые объявления от инкрементального обхода.
+# Короткий TTL только убирает повторные загрузки в пределах одного обхода
+LISTING_CACHE_TTL = int(os.getenv("LISTING_CACHE_TTL", 10 * 60))
+CACHE_MAX_BYTES = 500 * 1024 * 1024  # Предельный размер сжатых страниц на диске
+
+
+@dataclass
+class CachedPage:
+    url: str
+    body: str
+    fetched_at: float
+    etag: str | None
+    last_modified: str | None
+    fresh: bool
+
+    def conditional_headers(self):
+        """Заголовки для проверки, изменилась ли страница на сервере"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """Кэш страниц по нормализованному URL с TTL и вытеснением по LRU
+
+    Одинаковые страницы хранятся в одном файле objects/<sha256>.gz,
+    индекс URL -> хэш, время загрузки и валидаторы лежит в index.sqlite.
+    Для страниц выдачи действует отдельный короткий listing_ttl.
+
+    Методы синхронные: из асинхронного кода их вызывают через asyncio.to_thread.
+    """
+
+    def __init__(
+        self,
+        directory=CACHE_DIR,
+        ttl=CACHE_TTL,
+        max_bytes=CACHE_MAX_BYTES,
+        listing_ttl=LISTING_CACHE_TTL,
+    ):
+        self.directory = Path(directory)
+        self.objects_dir = self.directory / "objects"
+        self.ttl = ttl
+        self.listing_ttl = listing_ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.directory / "index.sqlite", check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url_key TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            )
+            """,
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_pages_accessed ON pages (accessed_at)")
+        self._db.commit()
+
+    def _object_path(self, digest):
+        return self.objects_dir / f"{digest}.gz"
+
+    def ttl_for(self, url):
+        return self.listing_ttl if is_listing_url(url) else self.ttl
+
+    def get(self, url):
+        """Страница из кэша (свежая или устаревшая) или None"""
+        url_key = normalize_url(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, fetched_at, etag, last_modified FROM pages WHERE url_key = ?",
+                (url_key,),
+            ).fetchone()
+            if not row:
+                return None
+
+            digest, fetched_at, etag, last_modified = row
+            try:
+                body = gzip.decompress(self._object_path(digest).read_bytes()).decode("utf-8")
+            except (OSError, EOFError):
+                self._db.execute("DELETE FROM pages WHERE url_key = ?", (url_key,))
+                self._db.commit()
+                return None
+
+            self._db.execute(
+                "UPDATE pages SET accessed_at = ? WHERE url_key = ?",
+                (time.time(), url_key),
+            )
+            self._db.commit()
+
+        return CachedPage(
+            url=url,
+            body=body,
+            fetched_at=fetched_at,
+            etag=etag,
+            last_modified=last_modified,
+            fresh=time.time() - fetched_at < self.ttl_for(url),
+        )
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """Сохранение страницы, файл с тем же содержимым не дублируется"""
+        data = body.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+
+        with self._lock:
+            if not path.exists():
+                tmp_path = path.with_suffix(".tmp")
+                tmp_path.write_bytes(gzip.compress(data))
+                os.replace(tmp_path, path)
+
+            now = time.time()
+            old_digest = self._db.execute(
+                "SELECT digest FROM pages WHERE url_key = ?",
+                (normalize_url(url),),
+            ).fetchone()
+            self._db.execute(
+                """
+                INSERT OR REPLACE INTO pages
+                    (url_key, digest, size, fetched_at, accessed_at, etag, last_modified)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (normalize_url(url), digest, path.stat().st_size, now, now, etag, last_modified),
+            )
+            if old_digest and old_digest[0] != digest:
+                self._remove_unreferenced(old_digest[0])
+            self._evict()
+            self._db.commit()
+
+    def refresh(self, url):
+        """Сервер ответил 304: страница не изменилась, продлеваем свежесть"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url_key = ?",
+                (now, now, normalize_url(url)),
+            )
+            self._db.commit()
+
+    def _remove_unreferenced(self, digest):
+        in_use = self._db.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,))
+        if not in_use.fetchone():
+            self._object_path(digest).unlink(missing_ok=True)
+
+    def _evict(self):
+        """Удаление давно не использованных страниц сверх лимита размера"""
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM pages)",
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._db.execute(
+            "SELECT url_key, digest FROM pages ORDER BY accessed_at",
+        ).fetchall()
+        for url_key, digest in rows:
+            self._db.execute("DELETE FROM pages WHERE url_key = ?", (url_key,))
+            in_use = self._db.execute(
+                "SELECT size FROM pages WHERE digest = ? LIMIT 1",
+                (digest,),
+            ).fetchone()
+            if not in_use:
+                path = self._object_path(digest)
+                if path.exists():
+                    total -= path.stat().st_size
+                    path.unlink()
+            if total <= self.max_bytes:
+                break
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+@lru_cache(maxsize=1)
+def get_page_cache():
+    """Общий кэш страниц для процесса"""
+    return PageCache()
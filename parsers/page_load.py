@@ -0,0 +1,117 @@
+# облегченная загрузка страниц в Chrome и замер трафика и времени загрузки
+import json
+from dataclasses import dataclass
+
+LIGHTWEIGHT_PAGE_LOAD_TIMEOUT = 20  # Без картинок и скриптов страница грузится быстрее
+
+# Ресурсы, которые не нужны для разметки объявлений
+BLOCKED_URL_PATTERNS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.avif",
+    "*.svg",
+    "*.ico",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.css",
+    "*.mp4",
+    "*.webm",
+    # Счетчики и реклама
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*mc.yandex.ru*",
+    "*an.yandex.ru*",
+    "*yandex.ru/ads*",
+    "*top-fwz1.mail.ru*",
+    "*vk.com/rtrg*",
+    "*criteo.com*",
+    "*adfox.ru*",
+]
+
+# Запрет картинок и прочего на уровне настроек профиля Chrome
+BLOCKING_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.stylesheets": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+}
+
+
+@dataclass
+class PageLoadStats:
+    url: str
+    load_time: float  # Секунды от driver.get до готовности body
+    transferred_bytes: int  # Байты по сети с учетом сжатия
+    requests_count: int
+
+    def __str__(self):
+        return (
+            f"{self.load_time:.2f} сек, {self.transferred_bytes / 1024:.1f} КБ, "
+            f"запросов: {self.requests_count}"
+        )
+
+
+def apply_stats_logging(chrome_options):
+    """Включает журнал производительности, из него считается трафик"""
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def apply_lightweight_options(chrome_options):
+    """Настройки Chrome для облегченного режима"""
+    chrome_options.page_load_strategy = "eager"  # Не ждем картинки и iframe
+    chrome_options.add_experimental_option("prefs", BLOCKING_PREFS)
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+
+
+def enable_request_blocking(driver):
+    """Блокировка ненужных запросов через DevTools"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+
+def drain_performance_log(driver):
+    """Очистка журнала производительности перед замеряемой загрузкой
+
+    В журнале остаются записи загрузок, статистика которых не собиралась:
+    заблокированных страниц, таймаутов, страницы установки cookies.
+    """
+    try:
+        driver.get_log("performance")
+    except Exception:
+        pass
+
+
+def collect_page_stats(driver, url, load_time):
+    """Считает трафик страницы по журналу производительности
+
+    Журнал очищается при каждом чтении. Записи чужих загрузок убираются
+    drain_performance_log перед загрузкой страницы.
+    """
+    transferred = 0
+    requests_count = 0
+
+    try:
+        entries = driver.get_log("performance")
+    except Exception as e:
+        print(f"Журнал производительности недоступен: {e}")
+        entries = []
+
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        if message["method"] == "Network.loadingFinished":
+            transferred += int(message["params"].get("encodedDataLength", 0))
+            requests_count += 1
+
+    return PageLoadStats(
+        url=url,
+        load_time=load_time,
+        transferred_bytes=transferred,
+        requests_count=requests_count,
+    )
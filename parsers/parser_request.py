@@ -1,76 +1,113 @@
 # стандратный запрос через браузер, рандомный юзер агент + бесплатный прокси
-import random
 import time
+from urllib.parse import urlparse
 
 import requests
-from fake_useragent import UserAgent
 
-# Список прокси (добавьте свои рабочие прокси)
-PROXIES = [
-    None,  # Попробовать без прокси
-    {"http": "http://52.201.245.219:20202", "https": "http://52.201.245.219:20202"},
-    {"http": "http://99.79.64.51:20201", "https": "http://99.79.64.51:20201"},
-]
+from parsers.archive import archive_page
+from parsers.async_fetcher import fetch_pages
+from parsers.async_fetcher import MAX_CONCURRENCY
+from parsers.block_detector import classify_html
+from parsers.cookie_store import get_cookie_store
+from parsers.extractor import extract_ads
+from parsers.http_client import build_headers
+from parsers.http_client import get_fetcher
+from parsers.http_client import proxy_key
+from parsers.incremental import crawl_incremental
+from parsers.page_cache import get_page_cache
+from parsers.proxy_pool import as_requests_proxies
+from parsers.proxy_pool import get_proxy_pool
+from parsers.rate_controller import get_rate_controller
+from parsers.seen_index import get_seen_ads_index
+
+PAGE_RANGE = (1, 3)  # Диапазон страниц для парсинга
+INCREMENTAL_MODE = True  # Останавливаться на странице, где все объявления уже известны
 
 
 def get_ip():
-    ua = UserAgent()
-    headers = {"User-Agent": ua.random}
-
-    try:
-        # Проверка IP без прокси
-        response = requests.get("https://api.ipify.org", headers=headers, timeout=10)
-        print("Ваш реальный IP:", response.text)
-
-        # Проверка IP через прокси (если есть рабочие прокси)
-        for proxy in PROXIES[1:]:
-            try:
-                response = requests.get(
-                    "https://api.ipify.org",
-                    headers=headers,
-                    proxies=proxy,
-                    timeout=10,
-                )
-                print(f"IP через прокси {proxy['http']}:", response.text)
-                return proxy  # Возвращаем первый рабочий прокси
-            except Exception as e:
-                print("Ошибка при проверке IP:", e)
-                continue
-        return None
-    except Exception as e:
-        print("Ошибка при проверке IP:", e)
-        return None
-
-
-def get_page(url, proxy=None):
-    ua = UserAgent()
-    headers = {
-        "User-Agent": ua.random,
-        "X-Requested-With": "XMLHttpRequest",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-        "Referer": "https://www.avito.ru/",
-    }
-
-    time.sleep(random.uniform(2, 5))
-
+    """Проверка всех прокси параллельно и выбор самого быстрого из работающих"""
+    pool = get_proxy_pool()
+    results = pool.probe_all()
+    print(f"Рабочих прокси: {sum(results.values())} из {len(results)}")
+
+    proxy = pool.choose()
+    print(f"Выбран прокси: {proxy or 'без прокси'}")
+    return as_requests_proxies(proxy)
+
+
+def get_page(url, proxy=None, fetcher=None, use_cache=True, user_agent=None, cookie_store=None):
+    """Загрузка страницы с cookies сессии из хранилища
+
+    user_agent нужно передавать тот же, с которым браузер получил cookies,
+    иначе сессия может не приниматься сайтом. Cookies из Set-Cookie ответа
+    попадают в хранилище в памяти, на диск его сохраняет вызывающий.
+    """
+    fetcher = fetcher or get_fetcher()
+    cookie_store = cookie_store if cookie_store is not None else get_cookie_store()
+    pool = get_proxy_pool()
+    rate_controller = get_rate_controller(urlparse(url).netloc)
+    cache = get_page_cache() if use_cache else None
+
+    # Свежая страница из кэша не требует запроса
+    cached = cache.get(url) if cache else None
+    if cached and cached.fresh:
+        return cached.body
+
+    # Темп подстраивается под ответы сайта вместо фиксированной паузы
+    rate_controller.wait()
+
+    started = time.monotonic()
     try:
-        response = requests.get(
+        response = fetcher.get(
             url,
-            headers=headers,
-            proxies=proxy,
+            proxy=proxy,
+            headers={
+                **(build_headers(user_agent) if user_agent else fetcher.headers()),
+                **(cached.conditional_headers() if cached else {}),
+            },
             timeout=30,
-            cookies={"session_id": str(random.randint(100000, 999999))},
+            cookies=cookie_store.as_dict(),
         )
-
-        if response.status_code == 200:
+        cookie_store.update_from_jar(response.cookies)
+
+        if response.status_code == 304 and cached:
+            # Страница не изменилась с прошлой загрузки
+            pool.record_success(proxy_key(proxy), time.monotonic() - started)
+            rate_controller.record_success()
+            cache.refresh(url)
+            return cached.body
+
+        verdict = classify_html(response.text)
+        if response.status_code == 200 and not verdict.blocked:
+            pool.record_success(proxy_key(proxy), time.monotonic() - started)
+            rate_controller.record_success()
+            archive_page(url, response.text, response.status_code, response.headers)
+            if cache:
+                cache.put(
+                    url,
+                    response.text,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
             return response.text
-        elif response.status_code == 429:
+        if response.status_code == 429:
+            # Ограничение темпа на стороне сайта, прокси исправен
+            rate_controller.record_block()
+        elif verdict.blocked:
+            # Страница бана или капчи - блокировка адреса, с которого шел запрос
+            pool.record_failure(proxy_key(proxy))
+            rate_controller.record_block()
+        if response.status_code == 429 or verdict.blocked:
             print("Обнаружена защита от ботов. Попробуйте:")
             print("- Использовать другие прокси")
             print("- Увеличить задержки между запросами")
             print("- Использовать мобильные заголовки")
         return None
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        # Ошибки соединения и прокси (ProxyError - частный случай ConnectionError)
+        pool.record_failure(proxy_key(proxy))
+        print(f"Ошибка соединения: {e}")
+        return None
     except Exception as e:
         print(f"Ошибка при запросе: {e}")
         return None
@@ -81,20 +118,40 @@ def main():
 
     # Находим рабочий прокси
     working_proxy = get_ip()
-
-    for page in range(1, 3):
-        print(f"\nПарсинг страницы {page}...")
-        url = f"{base_url}{page}"
-
-        html = get_page(url, working_proxy)
-        if html:
-            print(f"Успешно получена страница {page}")
-            # Здесь можно парсить HTML
+    proxy = working_proxy["http"] if working_proxy else None
+
+    urls = [f"{base_url}{page}" for page in range(*PAGE_RANGE)]
+    print(f"\nПарсинг страниц {PAGE_RANGE[0]}-{PAGE_RANGE[1] - 1}...")
+
+    def fetch_batch(batch):
+        # Страницы загружаются параллельно, задержки соблюдаются внутри движка
+        pages = fetch_pages(batch, proxy=proxy)
+        return {url: extract_ads(html, url) if html else None for url, html in pages.items()}
+
+    if INCREMENTAL_MODE:
+        # Обход до первой страницы, на которой нет новых объявлений
+        seen_index = get_seen_ads_index()
+        crawl = crawl_incremental(urls, fetch_batch, batch_size=MAX_CONCURRENCY)
+        for url, ads, new_ads in crawl:
+            # Объявления, которых не было ни в одном из прошлых обходов
+            ad_ids = [ad.id for ad in ads]
+            first_seen = len(ad_ids) - len(seen_index.contains_many(ad_ids))
+            seen_index.add_many(ad_ids)
+            print(
+                f"Страница {url}: объявлений {len(ads)}, новых {len(new_ads)}, "
+                f"впервые встречено {first_seen}",
+            )
+        seen_index.persist()
+        return
+
+    results = fetch_batch(urls)
+    for page, url in enumerate(urls, PAGE_RANGE[0]):
+        ads = results.get(url)
+        if ads is not None:
+            print(f"Успешно получена страница {page}, объявлений: {len(ads)}")
         else:
             print(f"Не удалось получить страницу {page}")
 
-        time.sleep(random.uniform(5, 15))
-
 
 if __name__ == "__main__":
     main()
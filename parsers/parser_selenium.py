@@ -1,10 +1,8 @@
-import os
-import pickle
 import random
 import time
+from urllib.parse import urlparse
 
 from selenium import webdriver
-from selenium.common.exceptions import NoSuchElementException
 from selenium.common.exceptions import TimeoutException
 from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.options import Options
@@ -12,6 +10,24 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from parsers.archive import archive_page
+from parsers.block_detector import classify_html
+from parsers.browser_extract import extract_in_browser
+from parsers.browser_lifecycle import DriverLifecycle
+from parsers.browser_lifecycle import reap_orphans
+from parsers.cookie_store import get_cookie_store
+from parsers.incremental import crawl_incremental
+from parsers.page_cache import get_page_cache
+from parsers.page_load import apply_lightweight_options
+from parsers.page_load import apply_stats_logging
+from parsers.page_load import collect_page_stats
+from parsers.page_load import drain_performance_log
+from parsers.page_load import enable_request_blocking
+from parsers.page_load import LIGHTWEIGHT_PAGE_LOAD_TIMEOUT
+from parsers.proxy_pool import get_proxy_pool
+from parsers.rate_controller import get_rate_controller
+from parsers.seen_index import get_seen_ads_index
+
 # Конфигурационные константы
 USER_AGENTS = [
     "Mozilla/5.0 (Linux; Android 10; SM-A505FN) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36",  # noqa E501
@@ -20,26 +36,43 @@ USER_AGENTS = [
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",  # noqa E501
 ]
 
-PROXY_LIST = [
-    None,  # Без прокси
-    "http://99.79.64.51:20201",  # Замените на реальные прокси
-    "http://13.250.172.255:20202",
-]
-
 BASE_URL = "https://m.avito.ru/kirovskaya_oblast_kirov/telefony/mobilnye_telefony/samsung-ASgBAgICAkS0wA2crzmwwQ2I_Dc?cd=1&p="
-COOKIES_FILE = "avito_cookies.pkl"
 PAGE_RANGE = (1, 2)  # Диапазон страниц для парсинга
-DELAY_RANGE = (10, 30)  # Увеличенный диапазон задержек
+# Начальный и предельные темпы запросов браузера, запросов в секунду
+SELENIUM_RATE = {"initial_rate": 1 / 20, "min_rate": 1 / 120, "max_rate": 1 / 5}
 MAX_RETRIES = 3  # Максимальное количество попыток переподключения
 PAGE_LOAD_TIMEOUT = 60  # Увеличенный таймаут ожидания загрузки страницы
 ELEMENT_TIMEOUT = 20  # Таймаут ожидания элементов
+LIGHTWEIGHT_MODE = True  # Блокировка картинок, шрифтов, стилей и счетчиков
+
+
+def get_page_rate_controller(url):
+    """Общий для всех браузеров контроллер темпа по хосту страницы"""
+    return get_rate_controller(urlparse(url).netloc, **SELENIUM_RATE)
+
+
+class PageBlockedError(Exception):
+    """Страница вернула блокировку или капчу"""
+
+    pass
 
 
 class AvitoParser:
-    def __init__(self, cookies_file=COOKIES_FILE):
-        self.cookies_file = cookies_file
+    def __init__(
+        self,
+        cookie_store=None,
+        lightweight=LIGHTWEIGHT_MODE,
+        collect_stats=True,
+        proxy_pool=None,
+    ):
+        self.cookie_store = cookie_store if cookie_store is not None else get_cookie_store()
+        self.lightweight = lightweight
+        self.collect_stats = collect_stats
+        self.page_stats = []  # PageLoadStats по каждой загруженной странице
         self.current_proxy = None
+        self.proxy_pool = proxy_pool or get_proxy_pool()
         self.user_agent = random.choice(USER_AGENTS)
+        self.lifecycle = DriverLifecycle()
         self.driver = self._init_driver()
         self._load_cookies()
 
@@ -50,9 +83,9 @@ class AvitoParser:
         # Настройка User-Agent
         chrome_options.add_argument(f"user-agent={self.user_agent}")
 
-        # Настройка прокси
-        if PROXY_LIST and random.random() > 0.5:
-            self.current_proxy = random.choice([p for p in PROXY_LIST if p])
+        # Настройка прокси: пул выбирает быстрый и здоровый (None - без прокси)
+        self.current_proxy = self.proxy_pool.choose()
+        if self.current_proxy:
             chrome_options.add_argument(f"--proxy-server={self.current_proxy}")
 
         # Важные параметры для избежания детекта
@@ -67,85 +100,63 @@ class AvitoParser:
         # Установка размеров окна (может помочь с некоторыми сайтами)
         chrome_options.add_argument("--window-size=1920,1080")
 
+        if self.lightweight:
+            apply_lightweight_options(chrome_options)
+        if self.collect_stats:
+            apply_stats_logging(chrome_options)
+
         driver = webdriver.Chrome(options=chrome_options)
 
         # Увеличенные таймауты
-        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
-        driver.implicitly_wait(5)  # Неявное ожидание
-
+        if self.lightweight:
+            enable_request_blocking(driver)
+            driver.set_page_load_timeout(LIGHTWEIGHT_PAGE_LOAD_TIMEOUT)
+        else:
+            driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        # Неявное ожидание не используется: элементы ждем явно через WebDriverWait
+
+        self.lifecycle.start(driver)
         return driver
 
     def _load_cookies(self):
-        """Загрузка cookies с обработкой ошибок"""
-        if os.path.exists(self.cookies_file):
-            try:
-                # Загружаем базовую страницу для установки cookies
-                self.driver.get("https://m.avito.ru/security/check")
+        """Установка cookies из общего хранилища, возвращает True если они были"""
+        try:
+            if not self.cookie_store.load():
+                return False
 
-                with open(self.cookies_file, "rb") as f:
-                    cookies = pickle.load(f)
+            # Загружаем базовую страницу для установки cookies
+            self.driver.get("https://m.avito.ru/security/check")
 
-                # Устанавливаем только актуальные cookies
-                for cookie in cookies:
-                    try:
-                        if "expiry" in cookie:
-                            del cookie["expiry"]
-                        self.driver.add_cookie(cookie)
-                    except Exception as e:
-                        print(f"Ошибка установки cookie {cookie.get('name')}: {e}")
+            for cookie in self.cookie_store.to_selenium():
+                try:
+                    self.driver.add_cookie(cookie)
+                except Exception as e:
+                    print(f"Ошибка установки cookie {cookie.get('name')}: {e}")
 
-                print(f"Загружены cookies. User-Agent: {self.user_agent[:50]}...")
+            print(f"Загружены cookies. User-Agent: {self.user_agent[:50]}...")
+            return True
 
-            except Exception as e:
-                print(f"Ошибка загрузки cookies: {e}")
+        except Exception as e:
+            print(f"Ошибка загрузки cookies: {e}")
+            return False
 
     def _save_cookies(self):
-        """Сохранение cookies с фильтрацией"""
+        """Передача cookies браузера в общее хранилище, файл пишется только при изменениях"""
         try:
-            cookies = [
-                c for c in self.driver.get_cookies() if c.get("domain", "").endswith("avito.ru")
-            ]
-            with open(self.cookies_file, "wb") as f:
-                pickle.dump(cookies, f)
+            self.cookie_store.update(self.driver.get_cookies())
+            self.cookie_store.save()
         except Exception as e:
             print(f"Ошибка сохранения cookies: {e}")
 
-    def _is_blocked(self):
-        """Проверка на блокировку с улучшенной логикой"""
-        try:
-            # Проверка по заголовку и тексту страницы
-            page_text = self.driver.page_source.lower()
-            block_indicators = [
-                "доступ временно ограничен",
-                "превышено количество запросов",
-                "429",
-                "403",
-                "капча",
-                "captcha",
-                "blocked",
-            ]
-
-            if any(indicator in page_text for indicator in block_indicators):
-                return True
-
-            # Проверка наличия элементов блокировки
-            block_selectors = [
-                '//*[contains(@class, "captcha")]',
-                '//*[contains(text(), "доступ ограничен")]',
-                '//*[contains(@id, "blocked")]',
-            ]
-
-            for selector in block_selectors:
-                try:
-                    if self.driver.find_element(By.XPATH, selector):
-                        return True
-                except NoSuchElementException:
-                    continue
-
-        except Exception as e:
-            print(f"Ошибка при проверке блокировки: {e}")
+    def _is_blocked(self, html=None):
+        """Проверка на блокировку по одному снимку страницы"""
+        if html is None:
+            html = self.driver.page_source
 
-        return False
+        verdict = classify_html(html)
+        if verdict.blocked:
+            print(f"Признак блокировки: {verdict.reason}")
+        return verdict.blocked
 
     def _reinit_driver(self):
         """Переинициализация драйвера с новыми параметрами"""
@@ -157,73 +168,168 @@ class AvitoParser:
             print(f"Ожидание {delay:.1f} сек перед повторной попыткой...")
             time.sleep(delay)
 
-            # Меняем параметры
-            self.user_agent = random.choice(USER_AGENTS)
-            if PROXY_LIST:
-                self.current_proxy = random.choice([p for p in PROXY_LIST if p])
-                print(
-                    f"Новые параметры: User-Agent={self.user_agent[:50]}..., "
-                    f"Proxy={self.current_proxy}",
-                )
-
-            self.driver = self._init_driver()
-
-            # Загружаем cookies или базовую страницу
-            if not self._load_cookies():
-                self.driver.get("https://m.avito.ru")
+            self._start_driver()
 
         except Exception as e:
             print(f"Ошибка при переинициализации драйвера: {e}")
             raise
 
-    def get_page(self, url, retry_count=0):
-        """Улучшенный метод получения страницы"""
+    def _start_driver(self):
+        """Запуск браузера с новыми User-Agent и прокси"""
+        # Меняем параметры, прокси выбирается заново в _init_driver
+        self.user_agent = random.choice(USER_AGENTS)
+        self.driver = self._init_driver()
+        print(
+            f"Новые параметры: User-Agent={self.user_agent[:50]}..., "
+            f"Proxy={self.current_proxy}",
+        )
+
+        # Загружаем cookies или базовую страницу
+        if not self._load_cookies():
+            self.driver.get("https://m.avito.ru")
+
+    def recycle_if_needed(self):
+        """Плановый перезапуск браузера между страницами по числу страниц или памяти"""
+        reason = self.lifecycle.recycle_reason()
+        if not reason:
+            return False
+
+        print(f"Плановый перезапуск браузера: {reason}")
+        self.close()
+        self._start_driver()
+        return True
+
+    def _navigate(self, url):
+        """Открывает страницу и ждет body, возвращает время загрузки"""
+        if self.collect_stats:
+            # Трафик прошлых загрузок без статистики не должен попасть в эту страницу
+            drain_performance_log(self.driver)
+        started = time.monotonic()
+        self.driver.get(url)
+
+        # Ожидание загрузки контента
+        WebDriverWait(self.driver, ELEMENT_TIMEOUT).until(
+            EC.presence_of_element_located((By.XPATH, "//body")),
+        )
+        return time.monotonic() - started
+
+    def _record_result(self, url, load_time, blocked):
+        """Учет результата в пуле прокси, контроллере темпа и статистике загрузки"""
+        if blocked:
+            self.proxy_pool.record_failure(self.current_proxy)
+            get_page_rate_controller(url).record_block()
+            raise PageBlockedError(url)
+
+        self.proxy_pool.record_success(self.current_proxy, load_time)
+        get_page_rate_controller(url).record_success()
+        self.lifecycle.record_page()
+
+        if self.collect_stats:
+            stats = collect_page_stats(self.driver, url, load_time)
+            self.page_stats.append(stats)
+            print(f"Страница загружена: {stats}")
+
+    def load_page(self, url):
+        """Одна попытка загрузки страницы без задержек и переподключений
+
+        Raises:
+            PageBlockedError: Если страница заблокирована
+            TimeoutException, WebDriverException: При ошибках браузера
+        """
+        load_time = self._navigate(url)
+
+        # Проверка на блокировку по тому же снимку, что вернется вызывающему
+        html = self.driver.page_source
+        self._record_result(url, load_time, self._is_blocked(html))
+        return html
+
+    def extract_page(self, url):
+        """Одна попытка загрузки с извлечением объявлений внутри браузера
+
+        В отличие от load_page, HTML страницы не передается из браузера:
+        скрипт возвращает только список объявлений и признаки блокировки.
+
+        Raises:
+            PageBlockedError: Если страница заблокирована
+            TimeoutException, WebDriverException: При ошибках браузера
+        """
+        load_time = self._navigate(url)
+
+        extraction = extract_in_browser(self.driver, url)
+        if extraction.verdict.blocked:
+            print(f"Признак блокировки: {extraction.verdict.reason}")
+        self._record_result(url, load_time, extraction.verdict.blocked)
+        return extraction
+
+    def _fetch_with_retries(self, load, url, retry_count=0):
+        """Вызов load(url) с адаптивной задержкой и переподключением при ошибках"""
         if retry_count >= MAX_RETRIES:
             print(f"Достигнуто максимальное количество попыток ({MAX_RETRIES})")
             return None
 
         try:
-            # Динамическая задержка перед запросом
-            delay = random.uniform(*DELAY_RANGE)
-            print(f"Задержка {delay:.1f} сек перед запросом...")
-            time.sleep(delay)
+            # Перезапуск разросшегося браузера, пока он не загружает страницу
+            self.recycle_if_needed()
 
-            # Загрузка страницы с явным ожиданием
-            self.driver.get(url)
-
-            # Ожидание загрузки контента
-            WebDriverWait(self.driver, ELEMENT_TIMEOUT).until(
-                EC.presence_of_element_located((By.XPATH, "//body")),
-            )
+            # Адаптивная задержка перед запросом
+            delay = get_page_rate_controller(url).wait()
+            print(f"Задержка {delay:.1f} сек перед запросом...")
 
-            # Проверка на блокировку
-            if self._is_blocked():
-                print("Обнаружена блокировка. Переинициализация драйвера...")
-                self._reinit_driver()
-                return self.get_page(url, retry_count + 1)
+            return load(url)
 
-            return self.driver.page_source
+        except PageBlockedError:
+            print("Обнаружена блокировка. Переинициализация драйвера...")
+            self._reinit_driver()
+            return self._fetch_with_retries(load, url, retry_count + 1)
 
         except TimeoutException:
             print(f"Таймаут при загрузке страницы (попытка {retry_count + 1}/{MAX_RETRIES})")
+            self.proxy_pool.record_failure(self.current_proxy)
             self._reinit_driver()
-            return self.get_page(url, retry_count + 1)
+            return self._fetch_with_retries(load, url, retry_count + 1)
 
         except WebDriverException as e:
             print(f"Ошибка WebDriver (попытка {retry_count + 1}/{MAX_RETRIES}): {str(e)[:100]}...")
+            # Сбой самого браузера прокси не касается, сетевые ошибки Chrome - касаются
+            if "net::ERR_" in str(e):
+                self.proxy_pool.record_failure(self.current_proxy)
             self._reinit_driver()
-            return self.get_page(url, retry_count + 1)
+            return self._fetch_with_retries(load, url, retry_count + 1)
 
         except Exception as e:
             print(f"Неожиданная ошибка: {e}")
             return None
 
+    def get_page(self, url, retry_count=0, use_cache=True):
+        """Улучшенный метод получения страницы
+
+        Браузер не умеет условные запросы, поэтому кэш используется только
+        пока страница свежая, после TTL она загружается заново.
+        """
+        cache = get_page_cache() if use_cache else None
+        cached = cache.get(url) if cache else None
+        if cached and cached.fresh:
+            print(f"Страница взята из кэша: {url}")
+            return cached.body
+
+        html = self._fetch_with_retries(self.load_page, url, retry_count)
+        if html:
+            archive_page(url, html)
+        if html and cache:
+            cache.put(url, html)
+        return html
+
+    def get_ads(self, url, retry_count=0):
+        """Объявления со страницы, извлеченные в браузере (PageExtraction или None)"""
+        return self._fetch_with_retries(self.extract_page, url, retry_count)
+
     def close(self):
         """Безопасное закрытие драйвера"""
         try:
             self._save_cookies()
             if hasattr(self, "driver") and self.driver:
-                self.driver.quit()
+                # Процессы Chrome, пережившие quit(), добиваются
+                self.lifecycle.stop(self.driver)
         except Exception as e:
             print(f"Ошибка при закрытии драйвера: {e}")
 
@@ -232,24 +338,26 @@ def main():
     parser = None
     try:
         parser = AvitoParser()
-
-        for page in range(*PAGE_RANGE):
-            print(f"\n=== Парсинг страницы {page} ===")
-            url = f"{BASE_URL}{page}"
-
-            html = parser.get_page(url)
-            if html:
-                print(f"Успешно получена страница {page}")
-                # Здесь можно добавить обработку HTML
-            else:
-                print(f"Не удалось получить страницу {page}")
-                break  # Прерываем цикл при неудачном запросе
-
-            # Дополнительная задержка между страницами
-            if page < PAGE_RANGE[1] - 1:
-                delay = random.uniform(20, 60)  # Большая задержка между страницами
-                print(f"Пауза {delay:.1f} сек перед следующей страницей...")
-                time.sleep(delay)
+        urls = [f"{BASE_URL}{page}" for page in range(*PAGE_RANGE)]
+
+        def fetch_batch(batch):
+            # Пауза между страницами выдерживается в get_ads по текущему темпу
+            extractions = {url: parser.get_ads(url) for url in batch}
+            return {url: e.ads if e else None for url, e in extractions.items()}
+
+        # Обход прекращается на первой странице без новых объявлений
+        # или при неудачном запросе
+        seen_index = get_seen_ads_index()
+        for url, ads, new_ads in crawl_incremental(urls, fetch_batch):
+            # Объявления, которых не было ни в одном из прошлых обходов
+            ad_ids = [ad.id for ad in ads]
+            first_seen = len(ad_ids) - len(seen_index.contains_many(ad_ids))
+            seen_index.add_many(ad_ids)
+            print(
+                f"Страница {url}: объявлений {len(ads)}, новых {len(new_ads)}, "
+                f"впервые встречено {first_seen}",
+            )
+        seen_index.persist()
 
     except KeyboardInterrupt:
         print("\nПарсинг прерван пользователем")
@@ -257,7 +365,15 @@ def main():
         print(f"Критическая ошибка: {e}")
     finally:
         if parser:
+            if parser.page_stats:
+                total_bytes = sum(s.transferred_bytes for s in parser.page_stats)
+                total_time = sum(s.load_time for s in parser.page_stats)
+                print(
+                    f"Загружено страниц: {len(parser.page_stats)}, "
+                    f"трафик {total_bytes / 1024:.1f} КБ, время загрузки {total_time:.1f} сек",
+                )
             parser.close()
+        reap_orphans()
         print("Парсинг завершен")
 
 
@@ -0,0 +1,150 @@
+# общий пул прокси: параллельная проверка, статистика и карантин неработающих
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from functools import lru_cache
+
+from parsers.http_client import get_fetcher
+
+# Список прокси (добавьте свои рабочие прокси), None - прямое соединение
+PROXY_LIST = [
+    None,
+    "http://52.201.245.219:20202",
+    "http://99.79.64.51:20201",
+    "http://13.250.172.255:20202",
+]
+
+PROBE_URL = "https://api.ipify.org"
+PROBE_TIMEOUT = 10
+STATS_WINDOW = 20  # Сколько последних запросов учитывать в статистике
+QUARANTINE_BASE = 30  # Первый карантин в секундах, далее удваивается
+QUARANTINE_MAX = 30 * 60
+MIN_LATENCY = 0.05  # Нижняя граница задержки, чтобы вес не уходил в бесконечность
+
+
+def as_requests_proxies(proxy):
+    """Прокси в формате параметра proxies для requests"""
+    if not proxy:
+        return None
+    return {"http": proxy, "https": proxy}
+
+
+@dataclass
+class ProxyStats:
+    proxy: str | None
+    results: deque = field(default_factory=lambda: deque(maxlen=STATS_WINDOW))
+    latencies: deque = field(default_factory=lambda: deque(maxlen=STATS_WINDOW))
+    failures_in_row: int = 0
+    quarantined_until: float = 0.0
+
+    @property
+    def success_rate(self):
+        # Сглаживание, чтобы новый прокси не считался ни идеальным, ни мертвым
+        return (sum(self.results) + 1) / (len(self.results) + 2)
+
+    @property
+    def avg_latency(self):
+        if not self.latencies:
+            return PROBE_TIMEOUT / 2
+        return sum(self.latencies) / len(self.latencies)
+
+    def is_available(self, now):
+        return now >= self.quarantined_until
+
+    def weight(self):
+        return self.success_rate / max(self.avg_latency, MIN_LATENCY)
+
+
+class ProxyPool:
+    """Выбор прокси с приоритетом быстрых и стабильных"""
+
+    def __init__(self, proxies=PROXY_LIST, probe_url=PROBE_URL, probe_timeout=PROBE_TIMEOUT):
+        self.probe_url = probe_url
+        self.probe_timeout = probe_timeout
+        self._stats = {proxy: ProxyStats(proxy) for proxy in proxies}
+        self._lock = threading.Lock()
+
+    def record_success(self, proxy, latency):
+        with self._lock:
+            stats = self._stats.setdefault(proxy, ProxyStats(proxy))
+            stats.results.append(True)
+            stats.latencies.append(latency)
+            stats.failures_in_row = 0
+            stats.quarantined_until = 0.0
+
+    def record_failure(self, proxy):
+        """Ошибка соединения, прокси или бан отправляют прокси в карантин с растущей паузой
+
+        Ответы сайта вроде 404 или 429 к прокси отношения не имеют и сюда не
+        передаются. Прямое соединение в карантин не попадает: это запасной
+        путь, когда все прокси недоступны.
+        """
+        with self._lock:
+            stats = self._stats.setdefault(proxy, ProxyStats(proxy))
+            stats.results.append(False)
+            if proxy is None:
+                return
+            stats.failures_in_row += 1
+            backoff = min(QUARANTINE_BASE * 2 ** (stats.failures_in_row - 1), QUARANTINE_MAX)
+            stats.quarantined_until = time.monotonic() + backoff
+
+    def _probe(self, proxy):
+        started = time.monotonic()
+        try:
+            response = get_fetcher().get(
+                self.probe_url,
+                proxy=as_requests_proxies(proxy),
+                timeout=self.probe_timeout,
+            )
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Прокси {proxy or 'без прокси'} не отвечает: {e}")
+            self.record_failure(proxy)
+            return False
+
+        self.record_success(proxy, time.monotonic() - started)
+        return True
+
+    def probe_all(self):
+        """Одновременная проверка всех прокси, возвращает {прокси: работает}"""
+        proxies = list(self._stats)
+        with ThreadPoolExecutor(max_workers=len(proxies) or 1) as executor:
+            results = list(executor.map(self._probe, proxies))
+        return dict(zip(proxies, results))
+
+    def choose(self):
+        """Случайный выбор прокси с весом по успешности и задержке"""
+        now = time.monotonic()
+        with self._lock:
+            available = [s for s in self._stats.values() if s.is_available(now)]
+            if not available:
+                # Все в карантине и прямого соединения в списке нет -
+                # берем тот, что освободится раньше всех
+                return min(self._stats.values(), key=lambda s: s.quarantined_until).proxy
+
+            weights = [s.weight() for s in available]
+            return random.choices(available, weights=weights)[0].proxy
+
+    def stats(self):
+        """Снимок статистики для логов"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "proxy": s.proxy,
+                    "success_rate": round(s.success_rate, 2),
+                    "avg_latency": round(s.avg_latency, 3),
+                    "quarantined_for": round(max(0.0, s.quarantined_until - now), 1),
+                }
+                for s in self._stats.values()
+            ]
+
+
+@lru_cache(maxsize=1)
+def get_proxy_pool():
+    """Общий пул прокси для обоих парсеров"""
+    return ProxyPool()
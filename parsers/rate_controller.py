@@ -0,0 +1,111 @@
+# адаптивный темп запросов: аддитивный рост при успехах, кратное снижение при блокировках
+import asyncio
+import random
+import threading
+import time
+
+INITIAL_RATE = 0.1  # Запросов в секунду на старте
+MIN_RATE = 1 / 120  # Не реже одного запроса в 2 минуты
+MAX_RATE = 1.0
+INCREASE_STEP = 0.01  # Прибавка к темпу после каждого успешного ответа
+DECREASE_FACTOR = 0.5  # Во сколько раз снижать темп при 429, капче или блокировке
+JITTER = 0.3  # Случайный разброс интервала, чтобы запросы не шли ровной сеткой
+
+
+class RateController:
+    """Темп запросов к сайту по схеме AIMD
+
+    Перед каждым запросом вызывается wait() или wait_async(), после ответа -
+    record_success() или record_block(). Интервал между запросами - 1 / rate.
+    """
+
+    def __init__(
+        self,
+        initial_rate=INITIAL_RATE,
+        min_rate=MIN_RATE,
+        max_rate=MAX_RATE,
+        increase_step=INCREASE_STEP,
+        decrease_factor=DECREASE_FACTOR,
+        jitter=JITTER,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.jitter = jitter
+        self._rate = min(max(initial_rate, min_rate), max_rate)
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self):
+        """Текущий темп, запросов в секунду"""
+        return self._rate
+
+    @property
+    def interval(self):
+        """Текущий средний интервал между запросами, сек"""
+        return 1 / self._rate
+
+    def _reserve_slot(self):
+        """Резервирует время следующего запроса, возвращает сколько ждать"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            jitter = random.uniform(1 - self.jitter, 1 + self.jitter)
+            self._next_slot = slot + self.interval * jitter
+        return slot - now
+
+    def wait(self):
+        delay = self._reserve_slot()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def wait_async(self):
+        delay = self._reserve_slot()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def record_success(self):
+        with self._lock:
+            self._rate = min(self.max_rate, self._rate + self.increase_step)
+
+    def record_block(self):
+        """Снижение темпа, следующий запрос сдвигается на новый интервал"""
+        with self._lock:
+            self._rate = max(self.min_rate, self._rate * self.decrease_factor)
+            self._next_slot = max(self._next_slot, time.monotonic() + self.interval)
+        print(f"Темп запросов снижен до {self._rate * 60:.1f} в минуту")
+
+
+_controllers = {}
+_overrides = {}
+_controllers_lock = threading.Lock()
+
+
+def get_rate_controller(host, **params):
+    """Общий контроллер темпа для хоста и набора параметров
+
+    Парсеры с разными параметрами (requests и selenium) получают разные
+    контроллеры, и параметры второго не теряются, если первым к хосту
+    обратился первый.
+    """
+    key = (host, tuple(sorted(params.items())))
+    with _controllers_lock:
+        if host in _overrides:
+            return _overrides[host]
+        controller = _controllers.get(key)
+        if controller is None:
+            controller = RateController(**params)
+            _controllers[key] = controller
+        return controller
+
+
+def override_rate_controller(host, **params):
+    """Один контроллер для всех обращений к хосту независимо от параметров, для замеров"""
+    controller = RateController(**params)
+    with _controllers_lock:
+        _overrides[host] = controller
+    return controller
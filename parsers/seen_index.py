@@ -0,0 +1,305 @@
+# компактный индекс уже встречавшихся id: фильтр Блума в mmap и точный отсортированный массив
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import lru_cache
+
+SEEN_INDEX_DIR = os.getenv("SEEN_INDEX_DIR", ".seen_index")
+EXPECTED_ITEMS = 5_000_000
+FALSE_POSITIVE_RATE = 0.001
+# Сколько id копится в журнале, прежде чем фильтр и массив перезаписываются целиком
+COMPACT_THRESHOLD = 100_000
+
+_HEADER = struct.Struct("<8sQQQ")  # сигнатура, размер в битах, число хэшей, число элементов
+_MAGIC = b"SEENBLM1"
+_MASK64 = (1 << 64) - 1
+
+
+def _bloom_params(expected_items, fp_rate):
+    bits = math.ceil(-expected_items * math.log(fp_rate) / math.log(2) ** 2)
+    bits = (bits + 7) // 8 * 8
+    hashes = max(1, round(bits / expected_items * math.log(2)))
+    return bits, hashes
+
+
+def key_to_int(key):
+    """id объявления как есть, строковый ключ (например, хэш строки) - 64 бита от sha256"""
+    if isinstance(key, int):
+        return key & _MASK64
+    digest = hashlib.sha256(str(key).encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def _merge_sorted(ids, added):
+    """Слияние отсортированного массива с отсортированным списком новых id без общего множества
+
+    Куски массива между позициями новых id копируются срезами, поэтому на
+    миллионах id нет ни цикла Python по всему массиву, ни множества в памяти.
+    """
+    merged = array("Q")
+    start = 0
+    for value in added:
+        position = bisect_left(ids, value, start)
+        merged.extend(ids[start:position])
+        start = position
+        if position < len(ids) and ids[position] == value:
+            continue  # Уже есть в массиве, скопируется со следующим куском
+        merged.append(value)
+    merged.extend(ids[start:])
+    return merged
+
+
+class SeenIndex:
+    """Проверка "уже видели" для миллионов id без запроса в БД на каждый
+
+    Фильтр Блума отвечает "точно нет" или "возможно да", "возможно да"
+    подтверждается по точному отсортированному массиву id. Файлы читаются
+    при первом обращении и перечитываются, если их обновил другой процесс.
+
+    persist() дописывает новые id в журнал, фильтр и массив перезаписываются
+    только при накоплении COMPACT_THRESHOLD id в журнале. Индекс локальный
+    для хоста и может отставать от БД, поэтому для проверок, от которых
+    зависит целостность данных, он только подсказка.
+    """
+
+    def __init__(
+        self,
+        name,
+        directory=SEEN_INDEX_DIR,
+        expected_items=EXPECTED_ITEMS,
+        fp_rate=FALSE_POSITIVE_RATE,
+        rebuild=None,
+    ):
+        self.bloom_path = os.path.join(directory, f"{name}.bloom")
+        self.ids_path = os.path.join(directory, f"{name}.ids")
+        self.log_path = os.path.join(directory, f"{name}.log")
+        self.lock_path = os.path.join(directory, f"{name}.lock")
+        self.directory = directory
+        self.expected_items = expected_items
+        self.fp_rate = fp_rate
+        self.rebuild = rebuild  # Функция, возвращающая все id, если файлов еще нет
+
+        self._lock = threading.RLock()
+        self._loaded_mtime = None
+        self._bloom = None
+        self._bits = 0
+        self._hashes = 0
+        self._ids = array("Q")
+        self._logged = set()  # Id из журнала, еще не слитые в отсортированный массив
+        self._log_offset = 0
+        self._pending = set()
+
+    # --- загрузка и сохранение ---
+
+    @contextmanager
+    def _file_lock(self):
+        """Блокировка файлов индекса между процессами на время записи"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _replay_log(self):
+        """Чтение записей журнала, добавленных после прошлого чтения"""
+        try:
+            with open(self.log_path, "rb") as f:
+                f.seek(self._log_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        data = data[: len(data) // 8 * 8]  # Недописанный хвост дочитается в следующий раз
+        if not data:
+            return
+
+        values = array("Q")
+        values.frombytes(data)
+        self._log_offset += len(data)
+        bloom = self._bloom
+        for value in values:
+            # Тот же id мог записать в журнал и другой процесс
+            if self._exact_contains(value):
+                continue
+            for p in self._positions(value):
+                bloom[p >> 3] |= 1 << (p & 7)
+            self._logged.add(value)
+
+    def _ensure_loaded(self):
+        try:
+            mtime = os.stat(self.ids_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        if self._bloom is not None and mtime == self._loaded_mtime:
+            self._replay_log()
+            return
+
+        pending = self._pending
+        if mtime is None:
+            self._create_empty()
+            if self.rebuild and self._loaded_mtime is None:
+                pending = pending | {key_to_int(key) for key in self.rebuild()}
+        else:
+            self._load_files()
+        self._loaded_mtime = mtime
+        self._logged = set()
+        self._log_offset = 0
+        if mtime is not None:
+            self._replay_log()
+
+        # Id, добавленные до перечитывания, не теряются
+        self._pending = set()
+        self._add_ints(pending)
+
+    def _create_empty(self):
+        self._bits, self._hashes = _bloom_params(self.expected_items, self.fp_rate)
+        self._bloom = bytearray(self._bits // 8)
+        self._ids = array("Q")
+
+    def _load_files(self):
+        with open(self.bloom_path, "rb") as f:
+            # ACCESS_COPY: изменения в памяти не пишутся в файл до persist()
+            bloom = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, bits, hashes, _ = _HEADER.unpack_from(bloom)
+        if magic != _MAGIC:
+            raise ValueError(f"Неверный формат файла {self.bloom_path}")
+
+        self._bits, self._hashes = bits, hashes
+        self._bloom = memoryview(bloom)[_HEADER.size :]
+
+        ids = array("Q")
+        with open(self.ids_path, "rb") as f:
+            ids.frombytes(f.read())
+        self._ids = ids
+
+    def persist(self):
+        """Сохранение новых id: дописывание в журнал, изредка - полная перезапись"""
+        with self._lock, self._file_lock():
+            self._ensure_loaded()
+            if not os.path.exists(self.ids_path):
+                self._compact()
+                return
+            if not self._pending:
+                return
+
+            values = array("Q", sorted(self._pending))
+            with open(self.log_path, "ab") as f:
+                values.tofile(f)
+            self._log_offset += values.itemsize * len(values)
+            self._logged.update(self._pending)
+            self._pending = set()
+
+            if len(self._logged) >= COMPACT_THRESHOLD:
+                self._compact()
+
+    def _compact(self):
+        """Атомарная перезапись фильтра и массива с id журнала, журнал очищается"""
+        added = self._logged | self._pending
+        if added:
+            self._ids = _merge_sorted(self._ids, sorted(added))
+        self._logged = set()
+        self._pending = set()
+
+        bloom_tmp = f"{self.bloom_path}.tmp"
+        with open(bloom_tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self._bits, self._hashes, len(self._ids)))
+            f.write(self._bloom)
+        ids_tmp = f"{self.ids_path}.tmp"
+        with open(ids_tmp, "wb") as f:
+            self._ids.tofile(f)
+
+        # Массив id заменяется последним: по его mtime другие процессы видят обновление
+        os.replace(bloom_tmp, self.bloom_path)
+        os.replace(ids_tmp, self.ids_path)
+        open(self.log_path, "wb").close()
+        self._log_offset = 0
+        self._loaded_mtime = os.stat(self.ids_path).st_mtime_ns
+
+    # --- фильтр Блума ---
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.to_bytes(8, "little"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self._bits for i in range(self._hashes)]
+
+    def _bloom_contains(self, value):
+        bloom = self._bloom
+        return all(bloom[p >> 3] & (1 << (p & 7)) for p in self._positions(value))
+
+    def _exact_contains(self, value):
+        if value in self._pending or value in self._logged:
+            return True
+        position = bisect_left(self._ids, value)
+        return position < len(self._ids) and self._ids[position] == value
+
+    def _add_ints(self, values):
+        """Добавление id, которых еще нет в индексе: известные повторно не пишутся в журнал"""
+        bloom = self._bloom
+        for value in values:
+            if self._bloom_contains(value) and self._exact_contains(value):
+                continue
+            for p in self._positions(value):
+                bloom[p >> 3] |= 1 << (p & 7)
+            self._pending.add(value)
+
+    # --- публичный интерфейс ---
+
+    def contains_many(self, keys):
+        """Множество ключей из keys, которые уже встречались"""
+        with self._lock:
+            self._ensure_loaded()
+            return {
+                key
+                for key in keys
+                if self._bloom_contains(value := key_to_int(key)) and self._exact_contains(value)
+            }
+
+    def maybe_contains_many(self, keys):
+        """Только фильтр Блума: ключи, которые, возможно, встречались
+
+        Для ключей вне результата ответ "нет" точный, остальные подтверждаются
+        во внешнем хранилище, например, одним запросом в БД.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            return {key for key in keys if self._bloom_contains(key_to_int(key))}
+
+    def add_many(self, keys):
+        with self._lock:
+            self._ensure_loaded()
+            self._add_ints(key_to_int(key) for key in keys)
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._ids) + len(self._logged) + len(self._pending)
+
+    def stats(self):
+        """Размер в памяти и ожидаемая доля ложных срабатываний фильтра"""
+        with self._lock:
+            self._ensure_loaded()
+            items = len(self._ids) + len(self._logged) + len(self._pending)
+            fp_rate = (1 - math.exp(-self._hashes * items / self._bits)) ** self._hashes
+            return {
+                "items": items,
+                "bloom_bytes": self._bits // 8,
+                "exact_bytes": self._ids.itemsize * len(self._ids),
+                "hashes": self._hashes,
+                "false_positive_rate": fp_rate,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_seen_ads_index():
+    """Общий индекс id объявлений, встреченных парсерами"""
+    return SeenIndex("ads")
@@ -0,0 +1,207 @@
+# разбиение большого поиска на непересекающиеся ценовые диапазоны, каждый меньше лимита страниц
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
+
+from parsers.extractor import extract_ads
+from parsers.extractor import extract_total_count
+from parsers.urls import with_page
+
+PAGE_CAP = 100  # Больше 100 страниц avito по одному поиску не отдает
+ADS_PER_PAGE = 50
+MAX_PRICE = 10**9  # Верхняя граница открытого диапазона цен
+PRICE_MIN_PARAM = "pmin"
+PRICE_MAX_PARAM = "pmax"
+SLICE_WORKERS = 4
+PROBE_ATTEMPTS = 3  # Попыток получить количество объявлений в диапазоне
+PROBE_RETRY_DELAY = 5  # Пауза между попытками, сек
+
+
+def with_price_range(url, price_min, price_max):
+    """Ссылка на поиск с ценой от price_min до price_max включительно"""
+    parts = urlsplit(url)
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in (PRICE_MIN_PARAM, PRICE_MAX_PARAM)
+    ]
+    query.append((PRICE_MIN_PARAM, str(price_min)))
+    query.append((PRICE_MAX_PARAM, str(price_max)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _price_bounds(url):
+    query = dict(parse_qsl(urlsplit(url).query))
+    try:
+        price_min = int(query.get(PRICE_MIN_PARAM, 0))
+        price_max = int(query.get(PRICE_MAX_PARAM, MAX_PRICE))
+    except ValueError:
+        return 0, MAX_PRICE
+    return price_min, price_max
+
+
+def _split_point(price_min, price_max):
+    """Середина диапазона, на широком - геометрическая: дешевых объявлений намного больше"""
+    if price_max > 4 * max(price_min, 1):
+        return int(math.sqrt(max(price_min, 1) * price_max))
+    return (price_min + price_max) // 2
+
+
+def _probe_total(url, fetch_page, attempts=PROBE_ATTEMPTS):
+    """Количество объявлений с первой страницы поиска, None если ее так и не удалось получить"""
+    for attempt in range(attempts):
+        if attempt:
+            time.sleep(PROBE_RETRY_DELAY)
+        html = fetch_page(with_page(url, 1))
+        total = extract_total_count(html) if html else None
+        if total is not None:
+            return total
+    return None
+
+
+@dataclass
+class PriceSlice:
+    url: str  # Ссылка на поиск в диапазоне цен без номера страницы
+    price_min: int
+    price_max: int
+    total_count: int
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(self.total_count / ADS_PER_PAGE))
+
+    def page_urls(self, max_pages=PAGE_CAP):
+        return [with_page(self.url, page) for page in range(1, min(self.pages, max_pages) + 1)]
+
+
+def split_search(search_url, fetch_page, max_pages=PAGE_CAP):
+    """
+    Рекурсивное деление поиска пополам по цене, пока каждая часть не уложится в max_pages
+
+    Количество объявлений в диапазоне берется с его первой страницы, поэтому
+    fetch_page лучше передавать с кэшем страниц - при обходе среза первая
+    страница не загрузится повторно.
+
+    Объявления без цены в ценовые диапазоны не попадают: если поиск и так
+    укладывается в лимит, он возвращается одним срезом без фильтра по цене.
+    Диапазон, для которого количество не получено и после повторов, не
+    теряется: он остается одним срезом на max_pages страниц.
+
+    Args:
+        search_url: Ссылка на поиск
+        fetch_page: Функция url -> HTML или None
+        max_pages: Лимит страниц на один срез
+
+    Returns:
+        Список PriceSlice, упорядоченный по цене
+    """
+    limit = max_pages * ADS_PER_PAGE
+
+    total = _probe_total(search_url, fetch_page)
+    if total is None:
+        print(f"Не удалось получить количество объявлений: {search_url}")
+        return []
+    if total <= limit:
+        price_min, price_max = _price_bounds(search_url)
+        return [PriceSlice(search_url, price_min, price_max, total)]
+
+    slices = []
+    # Стек вместо рекурсии: диапазоны обходятся по возрастанию цены
+    stack = [_price_bounds(search_url)]
+    while stack:
+        price_min, price_max = stack.pop()
+        url = with_price_range(search_url, price_min, price_max)
+        total = _probe_total(url, fetch_page)
+        if total is None:
+            # Обход среза остановится на первой пустой странице
+            print(f"Не удалось получить количество объявлений, диапазон не делится: {url}")
+            slices.append(PriceSlice(url, price_min, price_max, limit))
+            continue
+
+        if total <= limit or price_min >= price_max:
+            if total > limit:
+                print(f"Диапазон {price_min}-{price_max} не делится, объявлений: {total}")
+            if total:
+                slices.append(PriceSlice(url, price_min, price_max, total))
+            continue
+
+        middle = _split_point(price_min, price_max)
+        stack.append((middle + 1, price_max))
+        stack.append((price_min, middle))
+
+    print(f"Поиск разбит на {len(slices)} диапазонов цен")
+    return slices
+
+
+def crawl_slice(price_slice, fetch_page, max_pages=PAGE_CAP):
+    """Объявления со всех страниц одного среза, обход прекращается на пустой странице"""
+    ads = []
+    for url in price_slice.page_urls(max_pages):
+        html = fetch_page(url)
+        if html is None:
+            print(f"Страница не получена: {url}")
+            break
+        page_ads = extract_ads(html, url)
+        if not page_ads:
+            break
+        ads.extend(page_ads)
+    return ads
+
+
+def merge_ads(ads_lists):
+    """Объединение объявлений срезов без повторов по id"""
+    merged = {}
+    for ads in ads_lists:
+        for ad in ads:
+            merged.setdefault(ad.id, ad)
+    return list(merged.values())
+
+
+def crawl_slices(slices, fetch_page, max_workers=SLICE_WORKERS, max_pages=PAGE_CAP):
+    """Параллельный обход срезов в одном процессе и объединение результатов
+
+    Для обхода на нескольких машинах срезы ставятся в очередь через enqueue_slices.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda s: crawl_slice(s, fetch_page, max_pages), slices))
+
+    ads = merge_ads(results)
+    found = sum(len(slice_ads) for slice_ads in results)
+    print(f"Объявлений в срезах: {found}, без повторов: {len(ads)}")
+    return ads
+
+
+def enqueue_slices(db, slices, priority=0, max_pages=PAGE_CAP):
+    """Срезы как независимые поиски в очереди обхода для parsers.worker"""
+    from parsers.frontier import enqueue_search
+
+    return sum(
+        enqueue_search(db, s.url, min(s.pages, max_pages), priority=priority) for s in slices
+    )
+
+
+def main():
+    from parsers.parser_request import get_page
+
+    search_url = (
+        "https://www.avito.ru/kirovskaya_oblast_kirov/telefony/mobilnye_telefony"
+        "/samsung-ASgBAgICAkS0wA2crzmwwQ2I_Dc?cd=1"
+    )
+    slices = split_search(search_url, get_page)
+    for price_slice in slices:
+        print(
+            f"{price_slice.price_min}-{price_slice.price_max}: "
+            f"объявлений {price_slice.total_count}, страниц {price_slice.pages}",
+        )
+
+    ads = crawl_slices(slices, get_page)
+    print(f"Всего уникальных объявлений: {len(ads)}")
+
+
+if __name__ == "__main__":
+    main()
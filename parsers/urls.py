@@ -0,0 +1,69 @@
+# нормализация ссылок avito для ключей кэша и сравнения поисков
+import hashlib
+import re
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
+
+# Параметры, которые не влияют на выдачу и меняются от перехода к переходу
+TRACKING_PARAMS = {
+    "context",
+    "utm_source",
+    "utm_medium",
+    "utm_campaign",
+    "utm_content",
+    "utm_term",
+    "from",
+    "slocation",
+}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+PAGE_PARAM = "p"  # Номер страницы выдачи
+# Ссылка на объявление заканчивается на _<id>, остальные страницы - поиск и выдача
+_AD_PATH_RE = re.compile(r"_\d+/?$")
+
+
+def normalize_url(url):
+    """Ссылка в каноническом виде: хост в нижнем регистре, без якоря,
+    без служебных параметров и с отсортированными параметрами запроса
+
+    Ссылка с неверным портом или адресом хоста возвращается как есть, без
+    пробелов по краям: она совпадает только с такой же ссылкой.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    scheme = parts.scheme.lower()
+
+    host = (parts.hostname or "").lower()
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS
+    )
+
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def is_listing_url(url):
+    """Страница поиска или выдачи, а не отдельного объявления"""
+    return not _AD_PATH_RE.search(urlsplit(url).path)
+
+
+def with_page(url, page):
+    """Ссылка на страницу поиска с заданным номером"""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != PAGE_PARAM]
+    query.append((PAGE_PARAM, str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def url_hash(url):
+    """SHA-256 нормализованной ссылки для дедупликации"""
+    return hashlib.sha256(normalize_url(url).encode()).hexdigest()
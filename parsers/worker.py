@@ -0,0 +1,146 @@
+# обработчик очереди обхода: несколько процессов или хостов делят страницы через аренду в БД
+# Запуск: python -m parsers.worker
+import logging
+import os
+import signal
+import threading
+
+from database import SessionLocal
+from parsers.frontier import claim_batch
+from parsers.frontier import CLAIM_BATCH_SIZE
+from parsers.frontier import complete
+from parsers.frontier import default_worker_id
+from parsers.frontier import fail
+from parsers.frontier import heartbeat
+from parsers.frontier import LEASE_SECONDS
+from parsers.frontier import release
+from parsers.ingest import ingest_page
+
+logger = logging.getLogger(__name__)
+
+WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", CLAIM_BATCH_SIZE))
+HEARTBEAT_INTERVAL = LEASE_SECONDS // 3  # Продление аренды с запасом до ее истечения
+IDLE_SLEEP = int(os.getenv("WORKER_IDLE_SLEEP", 30))  # Пауза, если очередь пуста
+
+
+class CrawlWorker:
+    """Цикл "взять пачку - загрузить - отметить" с продлением аренды в фоне
+
+    Пока обработчик жив, фоновый поток продлевает аренду его страниц. Если
+    процесс упал, аренда истекает, и страницы забирают другие обработчики.
+    """
+
+    def __init__(
+        self,
+        fetch_page,
+        handle_page=ingest_page,
+        worker_id=None,
+        batch_size=WORKER_BATCH_SIZE,
+        lease_seconds=LEASE_SECONDS,
+        heartbeat_interval=HEARTBEAT_INTERVAL,
+        idle_sleep=IDLE_SLEEP,
+        exit_when_idle=False,
+        session_factory=SessionLocal,
+    ):
+        self.fetch_page = fetch_page
+        self.handle_page = handle_page
+        self.worker_id = worker_id or default_worker_id()
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_sleep = idle_sleep
+        self.exit_when_idle = exit_when_idle
+        self.session_factory = session_factory
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Остановка после текущей страницы"""
+        self._stop.set()
+
+    def _heartbeat_loop(self):
+        # Отдельная сессия: основная занята загрузкой страниц
+        db = self.session_factory()
+        try:
+            while not self._stop.wait(self.heartbeat_interval):
+                try:
+                    heartbeat(db, self.worker_id, self.lease_seconds)
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Ошибка продления аренды {self.worker_id}: {e}")
+        finally:
+            db.close()
+
+    def _process(self, db, page):
+        try:
+            html = self.fetch_page(page.url)
+        except Exception as e:
+            fail(db, page, self.worker_id, f"Ошибка загрузки: {e}")
+            return
+
+        if html is None:
+            fail(db, page, self.worker_id, "Страница не получена")
+            return
+
+        try:
+            self.handle_page(page, html)
+        except Exception as e:
+            logger.exception(f"Ошибка обработки страницы {page.url}")
+            fail(db, page, self.worker_id, f"Ошибка обработки: {e}")
+            return
+
+        complete(db, page, self.worker_id)
+
+    def run(self):
+        logger.info(f"Обработчик {self.worker_id} запущен")
+        heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat_thread.start()
+
+        db = self.session_factory()
+        processed = 0
+        try:
+            while not self._stop.is_set():
+                pages = claim_batch(db, self.worker_id, self.batch_size, self.lease_seconds)
+                if not pages:
+                    if self.exit_when_idle:
+                        break
+                    self._stop.wait(self.idle_sleep)
+                    continue
+
+                for page in pages:
+                    if self._stop.is_set():
+                        break
+                    self._process(db, page)
+                    processed += 1
+        finally:
+            self._stop.set()
+            heartbeat_thread.join()
+            # Невыполненные страницы сразу возвращаются в очередь, не дожидаясь истечения аренды
+            db.rollback()
+            released = release(db, self.worker_id)
+            db.close()
+            logger.info(
+                f"Обработчик {self.worker_id} остановлен: страниц {processed}, "
+                f"возвращено в очередь {released}"
+            )
+        return processed
+
+
+def main():
+    from parsers.parser_request import get_page
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    worker = CrawlWorker(get_page)
+    # docker stop отправляет SIGTERM: завершаем текущую страницу и отдаем остальные
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        print("\nОбработчик остановлен пользователем")
+
+
+if __name__ == "__main__":
+    main()
@@ -35,16 +35,29 @@ DEFAULT_SCHEDULES = [
         "interval_minutes": 10,
         "is_active": True,
     },
+    {
+        "task_name": "enqueue_parser_tasks",
+        "description": "Постановка поисков задач в очередь обхода собственных парсеров, "
+        "объявления сохраняются в базу обработчиками parsers.worker",
+        "interval_minutes": 24 * 60,
+        "is_active": False,
+    },
 ]
 
 
 def init_default_schedules(db: Session):
-    """Инициализирует таблицу task_schedules стандартными значениями"""
+    """Добавляет в task_schedules стандартные расписания, которых там еще нет
+
+    Уже существующие расписания не меняются: их интервал и активность могли
+    настроить в админ-панели.
+    """
     try:
-        if db.query(TaskSchedule).count() == 0:
+        existing = {task_name for (task_name,) in db.query(TaskSchedule.task_name)}
+        missing = [data for data in DEFAULT_SCHEDULES if data["task_name"] not in existing]
+        if missing:
             logger.info("Инициализация стандартных расписаний задач...")
 
-            for schedule_data in DEFAULT_SCHEDULES:
+            for schedule_data in missing:
                 schedule = TaskSchedule(
                     task_name=schedule_data["task_name"],
                     description=schedule_data["description"],
@@ -55,7 +68,7 @@ def init_default_schedules(db: Session):
                 db.add(schedule)
 
             db.commit()
-            logger.info(f"Добавлено {len(DEFAULT_SCHEDULES)} стандартных расписаний")
+            logger.info(f"Добавлено {len(missing)} стандартных расписаний")
     except Exception as e:
         db.rollback()
         logger.error(f"Ошибка инициализации расписаний: {e}", exc_info=True)
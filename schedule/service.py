@@ -12,6 +12,7 @@ from eshmakar_connector.tasks import enqueue_one_task_for_parsing
 from eshmakar_connector.tasks import reset_daily_tasks
 from eshmakar_connector.tasks import update_last_task_status_from_eshmakar
 from google_sheet.service import fetch_and_process_sheets
+from parsers.ingest import enqueue_active_tasks
 from schedule.models import TaskSchedule
 
 # Настройка логгера
@@ -126,6 +127,8 @@ def run_scheduled_task(task_id: int):
             fetch_and_process_sheets(db)
         elif task.task_name == "reset_daily_tasks":
             reset_daily_tasks(db)
+        elif task.task_name == "enqueue_parser_tasks":
+            enqueue_active_tasks(db)
         else:
             logger.warning(f"Неизвестный тип задачи: {task.task_name}")
 